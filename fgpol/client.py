@@ -5,10 +5,25 @@ FortiGate REST API client using requests.
 from __future__ import annotations
 
 import json
-from typing import Any, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
+from urllib3.util.retry import Retry
+
+from fgpol.fortios import extract_results
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:  # optional dependency
+    _json_loads = json.loads
+
+# Upper bound for concurrent page fetches; must not exceed the adapter pool_maxsize.
+MAX_PAGE_WORKERS = 8
 
 
 class FortiGateClient:
@@ -22,8 +37,26 @@ class FortiGateClient:
             {
                 "Authorization": f"Bearer {token}",
                 "Accept": "application/json",
+                # Large CMDB dumps compress well; pin it regardless of requests defaults.
+                "Accept-Encoding": "gzip, deflate",
             }
         )
+        self.session.verify = self.verify_tls
+
+        # Reuse pooled keep-alive connections (and TLS sessions) across calls,
+        # retrying idempotent GETs on transient errors.
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=32,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(["GET"]),
+            ),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
 
         if not self.verify_tls:
             requests.packages.urllib3.disable_warnings(
@@ -37,21 +70,33 @@ class FortiGateClient:
             debug: bool = False,
     ) -> Dict[str, Any]:
         url = f"{self.base_url}{path}"
-        params = params or {}
-
-        if debug:
-            req = requests.Request("GET", url, params=params)
-            prepped = self.session.prepare_request(req)
-            print(f"[DEBUG] GET {prepped.url}")
-            print(f"[DEBUG] TLS verify = {self.verify_tls}")
+        if not params:
+            params = None
 
         try:
-            resp = self.session.get(
-                url,
-                params=params,
-                timeout=self.timeout,
-                verify=self.verify_tls,
-            )
+            if debug:
+                # Send the same prepared request we print instead of building it twice.
+                prepped = self.session.prepare_request(
+                    requests.Request("GET", url, params=params)
+                )
+                print(f"[DEBUG] GET {prepped.url}")
+                print(f"[DEBUG] TLS verify = {self.verify_tls}")
+
+                settings = self.session.merge_environment_settings(
+                    prepped.url, {}, None, None, None
+                )
+                resp = self.session.send(
+                    prepped,
+                    timeout=self.timeout,
+                    allow_redirects=True,
+                    **settings,
+                )
+            else:
+                resp = self.session.get(
+                    url,
+                    params=params,
+                    timeout=self.timeout,
+                )
             resp.raise_for_status()
         except requests.RequestException as exc:
             raise RuntimeError(f"HTTP request failed for {url}: {exc}") from exc
@@ -60,10 +105,100 @@ class FortiGateClient:
             print(f"[DEBUG] HTTP {resp.status_code}")
             print(f"[DEBUG] Content-Type: {resp.headers.get('Content-Type')}")
 
+        # Fail fast on non-JSON bodies (e.g. HTML login/error pages).
+        ctype = resp.headers.get("Content-Type", "")
+        if ctype and "json" not in ctype.lower():
+            snippet = resp.text[:800] if resp.text else ""
+            raise RuntimeError(
+                f"Unexpected Content-Type {ctype!r} from {url}. Body: {snippet}"
+            )
+
+        # Parse raw bytes directly: skips requests' charset detection and
+        # uses orjson when installed.
         try:
-            return resp.json()
+            return _json_loads(resp.content)
         except json.JSONDecodeError as exc:
             snippet = resp.text[:800] if resp.text else ""
             raise RuntimeError(
                 f"Invalid JSON response from {url}: {exc}. Body: {snippet}"
             ) from exc
+
+    def get_all(
+            self,
+            path: str,
+            params: Optional[Dict[str, Any]] = None,
+            debug: bool = False,
+            max_pages: int = 100,
+    ) -> Dict[str, Any]:
+        """
+        GET a paginated CMDB collection, fetching follow-up pages concurrently.
+
+        Pages are requested with FortiOS `start`/`count` (a `limit` param is
+        taken as the page size; the boolean `skip` flag is dropped). Paging
+        stops on a short or empty page, or on a page identical to the previous
+        one (server ignored `start`). If the first page is larger than `count`,
+        the server returned the whole collection and no more pages are fetched.
+
+        Args:
+            path (str): API path, e.g. "/cmdb/firewall/policy".
+            params (Optional[Dict[str, Any]]): Query params (start/count honoured).
+            debug (bool): Print request/response debug info.
+            max_pages (int): Hard ceiling on the number of pages fetched.
+
+        Returns:
+            Dict[str, Any]: First page payload with "results" holding all rows.
+
+        Raises:
+            RuntimeError: If max_pages is reached before the collection ends.
+        """
+        params = dict(params or {})
+        params.pop("skip", None)
+        limit = params.pop("limit", 1000)
+        count = int(params.pop("count", limit))
+        start = int(params.pop("start", 0))
+
+        def fetch(offset: int) -> List[Dict[str, Any]]:
+            page = self.get(path, params={**params, "start": offset, "count": count}, debug=debug)
+            return extract_results(page)
+
+        first = self.get(path, params={**params, "start": start, "count": count}, debug=debug)
+        results: List[Dict[str, Any]] = list(extract_results(first))
+
+        payload = dict(first) if isinstance(first, dict) else {}
+        payload["results"] = results
+
+        # short page: done; oversized page: server ignored count and sent everything
+        if count <= 0 or len(results) != count:
+            return payload
+
+        prev = results[:]
+        pages_left = max_pages - 1
+        start += count
+        workers = min(MAX_PAGE_WORKERS, max(pages_left, 1))
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while pages_left > 0:
+                batch = min(workers, pages_left)
+                offsets = [start + i * count for i in range(batch)]
+
+                for rows in pool.map(fetch, offsets):
+                    if not rows:
+                        return payload
+                    if rows == prev:
+                        print(
+                            f"[WARN] {path}: page at start={start} repeats the previous page; "
+                            f"server ignores `start`, keeping the first {len(results)} rows."
+                        )
+                        return payload
+                    results.extend(rows)
+                    if len(rows) != count:
+                        return payload
+                    prev = rows
+                    start += count
+
+                pages_left -= batch
+
+        raise RuntimeError(
+            f"Pagination for {path} did not finish within max_pages={max_pages} "
+            f"(count={count}); refusing to return a truncated result."
+        )
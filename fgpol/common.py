@@ -0,0 +1,48 @@
+"""
+Shared helpers for the export scripts (scripts/export_*.py).
+
+.env parsing, value coercion, the REST client and result extraction live in
+fgpol.config / fgpol.client / fgpol.fortios and are reused from there.
+"""
+
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+
+def ensure_dir(path: str) -> None:
+    """Create directory if missing."""
+    Path(path).mkdir(parents=True, exist_ok=True)
+
+
+def safe_get(obj: Dict[str, Any], key: str) -> str:
+    """Get key from dict and normalize to str; handles missing keys."""
+    val = obj.get(key, "")
+    return str(val) if val is not None else ""
+
+
+def row_getter(*keys: str) -> Callable[[Dict[str, Any]], Tuple[str, ...]]:
+    """
+    Build a multi-key safe_get.
+
+    The returned function maps obj -> tuple of values for keys (in order),
+    normalized like safe_get; all keys are fetched with one map over obj.get.
+    """
+    def get(obj: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(["" if v is None else str(v) for v in map(obj.get, keys)])
+
+    return get
+
+
+def write_csv(path: Path, rows: Iterable[Sequence[Any]], fieldnames: List[str]) -> None:
+    """
+    Write CSV with UTF-8 and header.
+
+    rows are value tuples in fieldnames order; may be any iterable (consumed lazily).
+    """
+    with path.open("w", newline="", encoding="utf-8", buffering=1 << 20) as f:
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        writer.writerows(rows)
@@ -7,37 +7,78 @@ No environment variables are read directly.
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Dict, Optional
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from fgpol.fields import COLUMN_TABLE
+from fgpol.filters import build_server_filters
 
 
 # -----------------------------
 # .env parsing helpers
 # -----------------------------
+# KEY = VALUE (key/value trimmed); blank and comment lines are left unmatched.
+_DOTENV_RE = re.compile(r"^[ \t]*([^#=\s][^=\n]*?)[ \t]*=[ \t]*([^\n]*?)[ \t]*$", re.MULTILINE)
+
+_ParseKey = Tuple[str, int, int]
+
+# (abspath, mtime_ns, size) -> parsed .env
+_PARSE_CACHE: Dict[_ParseKey, Dict[str, str]] = {}
+
+
 def parse_dotenv(path: str) -> Dict[str, str]:
-    data: Dict[str, str] = {}
-    with open(path, "r", encoding="utf-8") as f:
-        for line_no, raw in enumerate(f, start=1):
-            line = raw.strip()
-            if not line or line.startswith("#"):
-                continue
+    """
+    Parse .env file, memoized in-process on (path, mtime, size).
+
+    Repeated loads of an unchanged file cost a single stat(). Nothing is
+    written to disk: the parsed file holds the API token.
+    """
+    st = os.stat(path)
+    key: _ParseKey = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+    data = _PARSE_CACHE.get(key)
+    if data is None:
+        data = _parse_dotenv_file(path)
+        _PARSE_CACHE[key] = data
+
+    return dict(data)
+
+
+def _check_skipped(text: str, start: int, end: int) -> None:
+    """Validate lines the KEY=VALUE regex did not consume (blank/comment only)."""
+    first_line_no = text.count("\n", 0, start) + 1
+    for offset, raw in enumerate(text[start:end].split("\n")):
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
 
-            if "=" not in line:
-                raise ValueError(f"Malformed .env line {line_no}: {raw!r}")
+        line_no = first_line_no + offset
+        if "=" not in line:
+            raise ValueError(f"Malformed .env line {line_no}: {raw!r}")
+        raise ValueError(f"Empty key in .env line {line_no}")
 
-            key, value = line.split("=", 1)
-            key = key.strip()
-            value = value.strip()
 
-            if not key:
-                raise ValueError(f"Empty key in .env line {line_no}")
+def _parse_dotenv_file(path: str) -> Dict[str, str]:
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    data: Dict[str, str] = {}
+    pos = 0
+    for m in _DOTENV_RE.finditer(text):
+        if m.start() > pos:
+            _check_skipped(text, pos, m.start())
+        pos = m.end()
 
-            if (value.startswith('"') and value.endswith('"')) or (
-                    value.startswith("'") and value.endswith("'")
-            ):
-                value = value[1:-1]
+        key, value = m.group(1), m.group(2)
+        if value[:1] in ("'", '"') and value[-1] == value[0]:
+            value = value[1:-1]
 
-            data[key] = value
+        data[key] = value
+
+    if pos < len(text):
+        _check_skipped(text, pos, len(text))
 
     return data
 
@@ -79,6 +120,8 @@ class AppConfig:
     verify_tls: bool
     timeout_seconds: int
     server_filter: Optional[str]
+    server_filter_pushdown: bool
+    paginate: bool
 
     # Output
     output_dir: str
@@ -99,6 +142,7 @@ class AppConfig:
     resolve_columns: str | None
     resolve_output_suffix: str | None
     resolve_dns_timeout: float
+    resolve_dns_workers: int
     resolve_fw_objects_path: str | None
 
     # Debug
@@ -106,12 +150,31 @@ class AppConfig:
     debug_response_keys: bool
     debug_results_type: bool
 
+    # Memoized to_query_params() result (config is immutable once loaded)
+    _query_params: Dict[str, Any] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
     def to_query_params(self) -> Dict[str, Any]:
+        if not self._query_params:
+            self._query_params.update(self._build_query_params())
+        return dict(self._query_params)
+
+    def _build_query_params(self) -> Dict[str, Any]:
         params: Dict[str, Any] = {"limit": 1000, "skip": 0}
         if self.vdom:
             params["vdom"] = self.vdom
+
+        server_filters: List[str] = []
         if self.server_filter:
-            params["filter"] = self.server_filter
+            server_filters.append(self.server_filter)
+        if self.server_filter_pushdown:
+            server_filters.extend(build_server_filters(self.filters))
+
+        if len(server_filters) == 1:
+            params["filter"] = server_filters[0]
+        elif server_filters:
+            params["filter"] = server_filters
         return params
 
 
@@ -143,6 +206,11 @@ def load_config(dotenv_path: str) -> AppConfig:
     except ValueError as exc:
         raise RuntimeError(f"Invalid float value in .env: {exc}") from exc
 
+    try:
+        resolve_dns_workers = to_int(data.get("RESOLVE_DNS_WORKERS"), 64)
+    except ValueError as exc:
+        raise RuntimeError(f"Invalid integer value in .env: {exc}") from exc
+
     resolve_enabled = to_bool(data.get("RESOLVE_ENABLED"), False)
     resolve_input_csv = to_str(data.get("RESOLVE_INPUT_CSV"))
     resolve_columns = to_str(data.get("RESOLVE_COLUMNS"))
@@ -185,17 +253,8 @@ def load_config(dotenv_path: str) -> AppConfig:
 
     # --- Output columns ---
     show_flags = {
-        "policyid": to_bool(data.get("SHOW_POLICYID"), True),
-        "name": to_bool(data.get("SHOW_NAME"), True),
-        "srcintf": to_bool(data.get("SHOW_SRCINTF"), True),
-        "dstintf": to_bool(data.get("SHOW_DSTINTF"), True),
-        "srcaddr": to_bool(data.get("SHOW_SRCADDR"), True),
-        "dstaddr": to_bool(data.get("SHOW_DSTADDR"), True),
-        "service": to_bool(data.get("SHOW_SERVICE"), True),
-        "action": to_bool(data.get("SHOW_ACTION"), True),
-        "status": to_bool(data.get("SHOW_STATUS"), True),
-        "schedule": to_bool(data.get("SHOW_SCHEDULE"), False),
-        "logtraffic": to_bool(data.get("SHOW_LOGTRAFFIC"), False),
+        flag: to_bool(data.get(f"SHOW_{flag.upper()}"), default)
+        for _, _, flag, default in COLUMN_TABLE
     }
 
     return AppConfig(
@@ -205,6 +264,8 @@ def load_config(dotenv_path: str) -> AppConfig:
         verify_tls=verify_tls,
         timeout_seconds=timeout_seconds,
         server_filter=to_str(data.get("FGT_SERVER_FILTER")),
+        server_filter_pushdown=to_bool(data.get("FGT_SERVER_FILTER_PUSHDOWN"), False),
+        paginate=to_bool(data.get("FGT_PAGINATE"), False),
 
         output_dir=to_str(data.get("OUTPUT_DIR")) or "./output",
         output_max_col_width=output_max_col_width,
@@ -221,6 +282,7 @@ def load_config(dotenv_path: str) -> AppConfig:
         resolve_columns=resolve_columns,
         resolve_output_suffix=resolve_output_suffix,
         resolve_dns_timeout=resolve_dns_timeout,
+        resolve_dns_workers=resolve_dns_workers,
         resolve_fw_objects_path=resolve_fw_objects_path,
 
         debug=to_bool(data.get("DEBUG"), False),
@@ -9,7 +9,7 @@ import os
 from datetime import datetime
 from typing import Dict, List, Tuple, Any
 
-from fgpol.fields import render_value
+from fgpol.fields import compute_renderers
 
 
 def ensure_output_dir(path: str) -> None:
@@ -47,13 +47,11 @@ def export_csv(
     path = os.path.join(output_dir, filename)
 
     headers = [h for h, _ in columns]
-    keys = [k for _, k in columns]
+    renderers = compute_renderers(columns)
 
-    with open(path, "w", newline="", encoding="utf-8") as f:
+    with open(path, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
         writer = csv.writer(f)
         writer.writerow(headers)
-
-        for row in rows:
-            writer.writerow([render_value(row, key) for key in keys])
+        writer.writerows([render(row) for render in renderers] for row in rows)
 
     return path
@@ -5,9 +5,37 @@ Output columns and value formatting (variative via SHOW_* flags).
 from __future__ import annotations
 
 import json
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Dict, List, Tuple
 
-from fgpol.filters import as_name_list
+from fgpol.filters import LIST_FIELDS, as_name_list
+
+try:
+    import orjson
+
+    def _json_dumps(value: Any) -> str:
+        return orjson.dumps(value).decode("utf-8")
+except ImportError:  # optional dependency
+    def _json_dumps(value: Any) -> str:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+Renderer = Callable[[Dict[str, Any]], str]
+
+# (header, field key, show flag, default visibility) in output order.
+# Flag "x" is configured via SHOW_X in .env.
+COLUMN_TABLE: Tuple[Tuple[str, str, str, bool], ...] = (
+    ("policyid", "policyid", "policyid", True),
+    ("name", "name", "name", True),
+    ("srcintf", "srcintf", "srcintf", True),
+    ("dstintf", "dstintf", "dstintf", True),
+    ("srcaddr", "srcaddr", "srcaddr", True),
+    ("dstaddr", "dstaddr", "dstaddr", True),
+    ("service", "service", "service", True),
+    ("action", "action", "action", True),
+    ("status", "status", "status", True),
+    ("schedule", "schedule", "schedule", False),
+    ("logtraffic", "logtraffic", "logtraffic", False),
+)
 
 
 def join_names(value: Any, sep: str = ",") -> str:
@@ -34,55 +62,49 @@ def compute_columns(show_flags: Dict[str, bool]) -> List[Tuple[str, str]]:
     Returns:
         List[Tuple[str, str]]: List of (header, field_key) in order.
     """
-    cols: List[Tuple[str, str]] = []
-
-    if show_flags.get("policyid", True):
-        cols.append(("policyid", "policyid"))
-    if show_flags.get("name", True):
-        cols.append(("name", "name"))
-
-    if show_flags.get("srcintf", True):
-        cols.append(("srcintf", "srcintf"))
-    if show_flags.get("dstintf", True):
-        cols.append(("dstintf", "dstintf"))
-
-    if show_flags.get("srcaddr", True):
-        cols.append(("srcaddr", "srcaddr"))
-    if show_flags.get("dstaddr", True):
-        cols.append(("dstaddr", "dstaddr"))
-    if show_flags.get("service", True):
-        cols.append(("service", "service"))
-
-    if show_flags.get("action", True):
-        cols.append(("action", "action"))
-    if show_flags.get("status", True):
-        cols.append(("status", "status"))
-    if show_flags.get("schedule", False):
-        cols.append(("schedule", "schedule"))
-    if show_flags.get("logtraffic", False):
-        cols.append(("logtraffic", "logtraffic"))
-
-    return cols
-
-
-def render_value(policy: Dict[str, Any], key: str) -> str:
+    return [
+        (header, key)
+        for header, key, flag, default in COLUMN_TABLE
+        if show_flags.get(flag, default)
+    ]
+
+
+def _render_scalar(value: Any) -> str:
+    if isinstance(value, (dict, list)):
+        return _json_dumps(value)
+    return str(value)
+
+
+def make_renderer(key: str) -> Renderer:
     """
-    Render a policy field into a readable string.
+    Build a renderer specialized for a single field key.
+
+    Key dispatch happens once here instead of once per cell.
 
     Args:
-        policy (Dict[str, Any]): Firewall policy object.
         key (str): Field key.
 
     Returns:
-        str: Rendered value.
+        Renderer: Callable rendering that field of a policy into a string.
     """
-    if key in ("srcintf", "dstintf", "srcaddr", "dstaddr", "service"):
-        return join_names(policy.get(key))
+    if key in LIST_FIELDS:
+        return lambda policy: join_names(policy.get(key))
 
     if key == "policyid":
-        return str(policy.get("policyid", policy.get("id", "")))
+        return lambda policy: str(policy.get("policyid", policy.get("id", "")))
+
+    return lambda policy: _render_scalar(policy.get(key, ""))
+
+
+def compute_renderers(columns: List[Tuple[str, str]]) -> List[Renderer]:
+    """
+    Build renderers parallel to (header, key) columns.
+
+    Args:
+        columns (List[Tuple[str, str]]): (header, key) pairs.
+
+    Returns:
+        List[Renderer]: One renderer per column, in order.
+    """
+    return [make_renderer(k) for _, k in columns]
 
-    value = policy.get(key, "")
-    if isinstance(value, (dict, list)):
-        return json.dumps(value, ensure_ascii=False)
-    return str(value)
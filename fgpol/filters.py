@@ -4,10 +4,13 @@ Client-side policy filtering.
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
 
 
-LIST_FIELDS = {"srcintf", "dstintf", "srcaddr", "dstaddr", "service"}
+LIST_FIELDS = frozenset({"srcintf", "dstintf", "srcaddr", "dstaddr", "service"})
+
+# Shared default for missing list fields; never mutated.
+_EMPTY_LIST: List[Any] = []
 
 
 def as_name_list(value: Any) -> List[str]:
@@ -28,6 +31,12 @@ def as_name_list(value: Any) -> List[str]:
     if value is None:
         return []
     if isinstance(value, list):
+        # Common FortiOS shape: [{"name": "..."}, ...]
+        try:
+            return [str(item["name"]) for item in value]
+        except (TypeError, KeyError):
+            pass
+
         out: List[str] = []
         for item in value:
             if isinstance(item, dict) and "name" in item:
@@ -61,85 +70,135 @@ def parse_csv_list(value: Optional[str]) -> List[str]:
     return [x.strip() for x in value.split(",") if x.strip()]
 
 
-def match_filter_str(needle: Optional[str], hay_value: Any) -> bool:
+def parse_csv_set(value: Optional[str]) -> FrozenSet[str]:
     """
-    Exact/contains match for a single value.
-
-    - For list-like fields: True if needle is contained in the list.
-    - For scalar fields: True if equals.
+    Parse comma-separated list from config into a set for O(1) membership.
 
     Args:
-        needle (Optional[str]): Filter value. If None, match is always True.
-        hay_value (Any): Policy field value.
+        value (Optional[str]): "A,B,C" or None.
 
     Returns:
-        bool: True if matches, else False.
+        FrozenSet[str]: frozenset({"A", "B", "C"})
     """
-    if needle is None:
-        return True
+    return frozenset(parse_csv_list(value))
 
-    hay_list = as_name_list(hay_value)
-    if hay_list:
-        return needle in hay_list
 
-    return str(hay_value) == needle
+FILTER_KEYS = ("srcintf", "dstintf", "action", "status", "name", "srcaddr", "dstaddr", "service")
 
+PolicyCheck = Callable[[Dict[str, Any]], bool]
 
-def match_in(allowed: List[str], hay_value: Any) -> bool:
+# (key, default, exact needle, IN set, NOT IN set)
+_ActiveCheck = Tuple[str, Any, Optional[str], FrozenSet[str], FrozenSet[str]]
+
+
+def build_predicate(flt: Dict[str, Any]) -> PolicyCheck:
     """
-    Inclusion filter (IN).
+    Build a policy predicate specialized for the active filters.
 
-    For list-like fields: True if ANY element is in allowed.
-    For scalar fields: True if scalar equals any allowed value.
+    Only fields with at least one filter set are checked; exact, IN and
+    NOT IN for a field are evaluated together on one normalized value,
+    rejecting the policy at the first failing check.
 
     Args:
-        allowed (List[str]): Allowed values list.
-        hay_value (Any): Policy field value.
+        flt (Dict[str, Any]): Filter criteria (see apply_filters).
 
     Returns:
-        bool: True if policy passes inclusion, else False.
+        PolicyCheck: Callable returning True if a policy passes all filters.
     """
-    if not allowed:
+    return _compile_filters(flt) or (lambda policy: True)
+
+
+def _compile_filters(flt: Dict[str, Any]) -> Optional[PolicyCheck]:
+    """Return the filter predicate, or None if no filter is set."""
+    active: List[_ActiveCheck] = []
+    for key in FILTER_KEYS:
+        needle = flt.get(key)
+        allowed = parse_csv_set(flt.get(f"{key}_in"))
+        excluded = parse_csv_set(flt.get(f"{key}_not_in"))
+
+        if needle is not None or allowed or excluded:
+            default: Any = _EMPTY_LIST if key in LIST_FIELDS else ""
+            active.append((key, default, needle, allowed, excluded))
+
+    want_id = flt.get("policyid")
+    want_id_str = str(want_id) if want_id is not None else None
+
+    if not active and want_id_str is None:
+        return None
+
+    def predicate(policy: Dict[str, Any]) -> bool:
+        get = policy.get
+        for key, default, needle, allowed, excluded in active:
+            value = get(key, default)
+
+            # Scalar strings (action/status/name) need no list normalization.
+            if isinstance(value, str):
+                if needle is not None and value != needle:
+                    return False
+                if allowed and value not in allowed:
+                    return False
+                if excluded and value in excluded:
+                    return False
+                continue
+
+            hay_list = as_name_list(value) or [str(value)]
+
+            if needle is not None and needle not in hay_list:
+                return False
+            if allowed and allowed.isdisjoint(hay_list):
+                return False
+            if excluded and not excluded.isdisjoint(hay_list):
+                return False
+
+        if want_id_str is not None:
+            return str(get("policyid", get("id", ""))) == want_id_str
         return True
 
-    hay_list = as_name_list(hay_value)
-    if hay_list:
-        return any(item in allowed for item in hay_list)
+    return predicate
+
+
+# Fields FortiOS can evaluate server-side via `filter=`. FortiOS `==` is
+# case-insensitive, so a pushed exact/IN term keeps a superset of what the
+# case-sensitive client-side check keeps. NOT IN (`!=`) would drop policies
+# the client would keep, so it is never pushed down.
+SERVER_FILTER_KEYS = ("name", "action", "status", "srcintf", "dstintf")
 
-    return str(hay_value) in allowed
 
+def _escape_server_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace(",", "\\,")
 
-def match_not_in(excluded: List[str], hay_value: Any) -> bool:
+
+def build_server_filters(flt: Dict[str, Any]) -> List[str]:
     """
-    Exclusion filter (NOT IN).
+    Translate compatible client-side filters into FortiOS `filter=` expressions.
 
-    For list-like fields: False if ANY element is in excluded.
-    For scalar fields: False if scalar equals any excluded value.
+    Separate expressions are ANDed by FortiOS; comma-separated terms inside
+    one expression are ORed (used for IN lists). Only terms whose server
+    result is a superset of the client-side result are emitted; apply_filters
+    still runs client-side and stays the source of truth.
 
     Args:
-        excluded (List[str]): Excluded values list.
-        hay_value (Any): Policy field value.
+        flt (Dict[str, Any]): Filter criteria (see apply_filters).
 
     Returns:
-        bool: True if policy passes exclusion, else False.
+        List[str]: e.g. ["status==enable", "srcintf==port1,srcintf==port2"]
     """
-    if not excluded:
-        return True
+    out: List[str] = []
 
-    hay_list = as_name_list(hay_value)
-    if hay_list:
-        return not any(item in excluded for item in hay_list)
+    want_id = flt.get("policyid")
+    if want_id is not None:
+        out.append(f"policyid=={_escape_server_value(str(want_id))}")
 
-    return str(hay_value) not in excluded
+    for key in SERVER_FILTER_KEYS:
+        needle = flt.get(key)
+        if needle is not None:
+            out.append(f"{key}=={_escape_server_value(needle)}")
 
+        allowed = parse_csv_list(flt.get(f"{key}_in"))
+        if allowed:
+            out.append(",".join(f"{key}=={_escape_server_value(v)}" for v in allowed))
 
-def _get_field_value(policy: Dict[str, Any], field: str) -> Any:
-    """
-    Get field value from policy with proper defaults.
-    """
-    if field in LIST_FIELDS:
-        return policy.get(field, [])
-    return policy.get(field, "")
+    return out
 
 
 def apply_filters(policies: List[Dict[str, Any]], flt: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -165,36 +224,7 @@ def apply_filters(policies: List[Dict[str, Any]], flt: Dict[str, Any]) -> List[D
     Returns:
         List[Dict[str, Any]]: Filtered policies.
     """
-    # Pre-parse IN/NOT IN lists once
-    list_keys = [
-        "srcintf", "dstintf", "action", "status", "name", "srcaddr", "dstaddr", "service"
-    ]
-    allowed_map = {k: parse_csv_list(flt.get(f"{k}_in")) for k in list_keys}
-    excluded_map = {k: parse_csv_list(flt.get(f"{k}_not_in")) for k in list_keys}
-
-    out: List[Dict[str, Any]] = []
-    for policy in policies:
-        # --- Exact/single-value filters (as before) ---
-        for key in list_keys:
-            if not match_filter_str(flt.get(key), _get_field_value(policy, key)):
-                break
-        else:
-            # --- IN filters ---
-            for key in list_keys:
-                if not match_in(allowed_map[key], _get_field_value(policy, key)):
-                    break
-            else:
-                # --- NOT IN filters ---
-                for key in list_keys:
-                    if not match_not_in(excluded_map[key], _get_field_value(policy, key)):
-                        break
-                else:
-                    # --- policyid exact match ---
-                    policy_id = policy.get("policyid", policy.get("id", ""))
-                    want_id = flt.get("policyid")
-                    if want_id is not None and str(policy_id) != str(want_id):
-                        continue
-
-                    out.append(policy)
-
-    return out
+    predicate = _compile_filters(flt)
+    if predicate is None:
+        return list(policies)
+    return list(filter(predicate, policies))
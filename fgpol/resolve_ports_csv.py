@@ -22,9 +22,10 @@ Writes output CSV to OUTPUT_DIR with suffix PORTS_RESOLVE_OUTPUT_SUFFIX (default
 from __future__ import annotations
 
 import csv
+import os
 import sys
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
@@ -40,11 +41,20 @@ def _pick_input_csv(output_dir: str, explicit: str | None) -> Path:
             raise FileNotFoundError(f"Input CSV not found: {p}")
         return p
 
-    out = Path(output_dir)
-    candidates = sorted(out.glob("*.csv"), key=lambda p: p.stat().st_mtime, reverse=True)
-    if not candidates:
-        raise FileNotFoundError(f"No CSV files found in output dir: {out}")
-    return candidates[0]
+    # newest *.csv; DirEntry caches file type/stat from the directory scan
+    newest = None
+    try:
+        with os.scandir(output_dir) as it:
+            newest = max(
+                ((e.stat().st_mtime, e.path) for e in it if e.name.endswith(".csv") and e.is_file()),
+                default=None,
+            )
+    except FileNotFoundError:
+        pass
+
+    if newest is None:
+        raise FileNotFoundError(f"No CSV files found in output dir: {Path(output_dir)}")
+    return Path(newest[1])
 
 
 def _parse_columns(value: str | None) -> List[str]:
@@ -57,26 +67,15 @@ def _parse_columns(value: str | None) -> List[str]:
 
 
 def _split_tokens(cell: str) -> List[str]:
-    return [t.strip() for t in cell.split(",") if t.strip()]
+    return list(filter(None, map(str.strip, cell.split(","))))
 
 
 def _join_ports(parts: List[str]) -> str:
-    tokens: List[str] = []
-    for p in parts:
-        if not p:
-            continue
-        for t in str(p).split():
-            if t:
-                tokens.append(t)
+    # single pass: split + ordered dedup (dict preserves insertion order)
+    return " ".join(dict.fromkeys(t for p in parts if p for t in str(p).split()))
 
-    seen: Set[str] = set()
-    out: List[str] = []
-    for t in tokens:
-        if t not in seen:
-            seen.add(t)
-            out.append(t)
 
-    return " ".join(out)
+_PORT_COLUMNS = ("tcp_ports", "udp_ports", "udplite_ports", "sctp_ports")
 
 
 def load_services_table(path: Path) -> Dict[str, str]:
@@ -85,25 +84,27 @@ def load_services_table(path: Path) -> Dict[str, str]:
         raise FileNotFoundError(f"Services CSV not found: {path}")
 
     m: Dict[str, str] = {}
-    with path.open("r", encoding="utf-8-sig", newline="") as f:
-        r = csv.DictReader(f)
-        if not r.fieldnames:
+    with path.open("r", encoding="utf-8-sig", newline="", buffering=1 << 20) as f:
+        r = csv.reader(f)
+        header = next(r, None)
+        if not header:
             return m
 
-        required = {"name", "tcp_ports", "udp_ports", "udplite_ports", "sctp_ports"}
-        if not required.issubset(set(r.fieldnames)):
-            raise ValueError(f"Services CSV must contain columns {sorted(required)}. Found: {r.fieldnames}")
+        required = {"name", *_PORT_COLUMNS}
+        if not required.issubset(header):
+            raise ValueError(f"Services CSV must contain columns {sorted(required)}. Found: {header}")
+
+        # last duplicate column wins, as with DictReader
+        col = {c: i for i, c in enumerate(header)}
+        name_idx = col["name"]
+        port_idx = [col[c] for c in _PORT_COLUMNS]
 
         for row in r:
-            name = (row.get("name") or "").strip()
+            n = len(row)
+            name = (row[name_idx] if name_idx < n else "").strip()
             if not name:
                 continue
-            ports = _join_ports([
-                row.get("tcp_ports") or "",
-                row.get("udp_ports") or "",
-                row.get("udplite_ports") or "",
-                row.get("sctp_ports") or "",
-            ])
+            ports = _join_ports([row[i] if i < n else "" for i in port_idx])
             m[name] = ports
 
     return m
@@ -115,25 +116,27 @@ def load_groups_table(path: Path) -> Dict[str, str]:
         raise FileNotFoundError(f"Service groups CSV not found: {path}")
 
     tmp: Dict[str, List[str]] = {}
-    with path.open("r", encoding="utf-8-sig", newline="") as f:
-        r = csv.DictReader(f)
-        if not r.fieldnames:
+    with path.open("r", encoding="utf-8-sig", newline="", buffering=1 << 20) as f:
+        r = csv.reader(f)
+        header = next(r, None)
+        if not header:
             return {}
 
-        required = {"group_name", "tcp_ports", "udp_ports", "udplite_ports", "sctp_ports"}
-        if not required.issubset(set(r.fieldnames)):
-            raise ValueError(f"Groups CSV must contain columns {sorted(required)}. Found: {r.fieldnames}")
+        required = {"group_name", *_PORT_COLUMNS}
+        if not required.issubset(header):
+            raise ValueError(f"Groups CSV must contain columns {sorted(required)}. Found: {header}")
+
+        # last duplicate column wins, as with DictReader
+        col = {c: i for i, c in enumerate(header)}
+        group_idx = col["group_name"]
+        port_idx = [col[c] for c in _PORT_COLUMNS]
 
         for row in r:
-            g = (row.get("group_name") or "").strip()
+            n = len(row)
+            g = (row[group_idx] if group_idx < n else "").strip()
             if not g:
                 continue
-            ports = _join_ports([
-                row.get("tcp_ports") or "",
-                row.get("udp_ports") or "",
-                row.get("udplite_ports") or "",
-                row.get("sctp_ports") or "",
-            ])
+            ports = _join_ports([row[i] if i < n else "" for i in port_idx])
             if ports:
                 tmp.setdefault(g, []).append(ports)
 
@@ -143,16 +146,25 @@ def load_groups_table(path: Path) -> Dict[str, str]:
     return out
 
 
-def resolve_service_token(token: str, svc_map: Dict[str, str], grp_map: Dict[str, str]) -> str:
-    ports = svc_map.get(token)
-    if ports is not None:
-        return f"{token}({ports})" if ports else f"{token}()"
+class ServiceResolver:
+    """Resolve service cells into name(ports), memoizing whole cells."""
+
+    def __init__(self, svc_map: Dict[str, str], grp_map: Dict[str, str]) -> None:
+        # token -> display string, prebuilt once; services shadow groups
+        display = {n: f"{n}({p})" if p else f"{n}()" for n, p in svc_map.items()}
+        for n, p in grp_map.items():
+            display.setdefault(n, f"{n}({p})" if p else f"{n}()")
 
-    gports = grp_map.get(token)
-    if gports is not None:
-        return f"{token}({gports})" if gports else f"{token}()"
+        self._display = display
+        self._cell_cache: Dict[str, str] = {}
 
-    return token
+    def resolve_cell(self, cell: str) -> str:
+        resolved = self._cell_cache.get(cell)
+        if resolved is None:
+            display = self._display
+            resolved = ", ".join(display.get(t, t) for t in _split_tokens(cell))
+            self._cell_cache[cell] = resolved
+        return resolved
 
 
 def main() -> int:
@@ -181,30 +193,41 @@ def main() -> int:
     out_name = f"{input_csv.stem}{suffix}{input_csv.suffix}"
     out_path = out_dir / out_name
 
-    with input_csv.open("r", encoding="utf-8", newline="") as fin:
-        reader = csv.DictReader(fin)
-        if not reader.fieldnames:
+    with input_csv.open("r", encoding="utf-8", newline="", buffering=1 << 20) as fin:
+        reader = csv.reader(fin)
+        header = next(reader, None)
+        if not header:
             raise ValueError("CSV has no header row.")
 
-        missing = [c for c in columns_to_resolve if c not in reader.fieldnames]
+        missing = [c for c in columns_to_resolve if c not in header]
         if missing:
-            raise ValueError(f"Columns not found in CSV header: {missing}. Header: {reader.fieldnames}")
+            raise ValueError(f"Columns not found in CSV header: {missing}. Header: {header}")
+
+        resolve_idx = [header.index(c) for c in columns_to_resolve]
+        width = len(header)
+        resolver = ServiceResolver(svc_map, grp_map)
+
+        # output is opened only after the header checked out, so a bad input
+        # never truncates an earlier result
+        with out_path.open("w", encoding="utf-8", newline="", buffering=1 << 20) as fout:
+            writer = csv.writer(fout)
+            writer.writerow(header)
+
+            # hoisted bound methods: avoid attribute lookups per row/cell
+            resolve_cell = resolver.resolve_cell
+            writerow = writer.writerow
 
-        rows: List[Dict[str, str]] = []
-        for row in reader:
-            for col in columns_to_resolve:
-                cell = (row.get(col) or "").strip()
-                if not cell:
+            for row in reader:
+                if not row:
                     continue
-                tokens = _split_tokens(cell)
-                resolved = [resolve_service_token(t, svc_map, grp_map) for t in tokens]
-                row[col] = ", ".join(resolved)
-            rows.append(row)
-
-    with out_path.open("w", encoding="utf-8", newline="") as fout:
-        writer = csv.DictWriter(fout, fieldnames=reader.fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
+                if len(row) < width:
+                    # short rows are padded to the header, as DictReader/DictWriter did
+                    row.extend([""] * (width - len(row)))
+                for i in resolve_idx:
+                    cell = row[i].strip()
+                    if cell:
+                        row[i] = resolve_cell(cell)
+                writerow(row)
 
     print(f"Ports-resolved CSV written: {out_path}")
     return 0
@@ -13,9 +13,73 @@ from __future__ import annotations
 import csv
 import ipaddress
 import socket
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+@lru_cache(maxsize=8192)
+def _parse_ip_int(value: str) -> Optional[Tuple[int, int]]:
+    """
+    Parse an IPv4/IPv6 literal into (version, integer) via inet_pton.
+
+    Avoids building ipaddress objects on hot lookup paths; memoized because
+    the same literals recur across rows (is_ip, fw_objects lookups, masks).
+    IPv6 scope ids ("fe80::1%eth0") are accepted and ignored.
+    """
+    try:
+        if ":" in value:
+            addr, sep, scope = value.partition("%")
+            if sep and not scope:
+                return None
+            return 6, int.from_bytes(socket.inet_pton(socket.AF_INET6, addr), "big")
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, value), "big")
+    except (OSError, ValueError):
+        return None
+
+
+_ADDR_BITS = {4: 32, 6: 128}
+
+# (version, network_int, prefixlen, object name)
+_Network = Tuple[int, int, int, str]
+
+
+def _prefix_mask(prefix: int, bits: int) -> int:
+    return ((1 << bits) - 1) ^ ((1 << (bits - prefix)) - 1)
+
+
+def _int_to_ip_str(version: int, value: int) -> str:
+    return str(ipaddress.IPv4Address(value) if version == 4 else ipaddress.IPv6Address(value))
+
+
+def _parse_network(cidr: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Parse "addr[/prefixlen]" into (version, network_int, prefixlen), non-strict.
+
+    Netmask/hostmask suffixes ("10.0.0.0/255.0.0.0") are rare and handed
+    to ipaddress.
+    """
+    addr, sep, prefix_str = cidr.partition("/")
+    parsed = _parse_ip_int(addr)
+    if parsed is None:
+        return None
+    version, ip_int = parsed
+    bits = _ADDR_BITS[version]
+
+    if not sep:
+        prefix = bits
+    elif prefix_str.isascii() and prefix_str.isdigit() and int(prefix_str) <= bits:
+        prefix = int(prefix_str)
+    else:
+        try:
+            network = ipaddress.ip_network(cidr, strict=False)
+        except ValueError:
+            return None
+        return network.version, int(network.network_address), network.prefixlen
+
+    return version, ip_int & _prefix_mask(prefix, bits), prefix
 
 
 @dataclass(frozen=True)
@@ -45,11 +109,24 @@ class FwObjectsLookup:
 
     def __init__(self, path: Path) -> None:
         self.path = path
-        self._networks: List[Tuple[ipaddress._BaseNetwork, str]] = []
+        # [(netmask_int, {network_int: name}), ...], longest prefix first,
+        # kept per address family so a lookup never probes the other one
+        self._tables_v4: List[Tuple[int, Dict[int, str]]] = []
+        self._tables_v6: List[Tuple[int, Dict[int, str]]] = []
         self._name_to_ref: Dict[str, str] = {}
+        self._ip_name_cache: Dict[str, Optional[str]] = {}
+        self._name_ref_cache: Dict[str, Optional[str]] = {}
 
     @staticmethod
     def _mask_to_prefix(mask_str: str) -> int:
+        parsed = _parse_ip_int(mask_str)
+        if parsed is not None and parsed[0] == 4:
+            # contiguous netmask: host bits are all trailing ones
+            host_bits = ~parsed[1] & 0xFFFFFFFF
+            if host_bits & (host_bits + 1) == 0:
+                return 32 - host_bits.bit_length()
+
+        # prefix-length / hostmask forms; raises ValueError on invalid masks
         return ipaddress.IPv4Network(f"0.0.0.0/{mask_str}").prefixlen
 
     @staticmethod
@@ -61,7 +138,7 @@ class FwObjectsLookup:
         if not self.path.exists():
             raise FileNotFoundError(f"fw_objects file not found: {self.path}")
 
-        with self.path.open("r", encoding="utf-8-sig", newline="") as f:
+        with self.path.open("r", encoding="utf-8-sig", newline="", buffering=1 << 20) as f:
             sample = f.read(4096)
             f.seek(0)
 
@@ -71,112 +148,158 @@ class FwObjectsLookup:
                 dialect = csv.excel
                 dialect.delimiter = "\t"
 
-            reader = csv.DictReader(f, dialect=dialect)
-            if not reader.fieldnames:
+            reader = csv.reader(f, dialect=dialect)
+            header = next(reader, None)
+            if not header:
                 raise ValueError("fw_objects must contain a header row.")
 
-            fields = set(reader.fieldnames)
+            # column -> index; on duplicate headers the last one wins (as with DictReader)
+            col = {name: i for i, name in enumerate(header)}
 
             # Detect schema
             ru_required = {"Имя объекта", "ip", "mask"}
             en_required = {"name", "cidr"}
 
-            is_ru = ru_required.issubset(fields)
-            is_en = en_required.issubset(fields)
+            is_ru = ru_required.issubset(col)
+            is_en = en_required.issubset(col)
 
             if not (is_ru or is_en):
                 raise ValueError(
                     "fw_objects must contain either RU columns: "
                     + ", ".join(sorted(ru_required))
                     + " OR EN columns: name,cidr. "
-                    + f"Found: {reader.fieldnames}"
+                    + f"Found: {header}"
                 )
 
-            networks: List[Tuple[ipaddress._BaseNetwork, str]] = []
+            networks: List[_Network] = []
             name_to_ref: Dict[str, str] = {}
 
+            if is_ru:
+                name_i, ip_i, mask_i = col["Имя объекта"], col["ip"], col["mask"]
+            else:
+                name_i, cidr_i = col["name"], col["cidr"]
+
             for row in reader:
+                if not row:
+                    continue
+                n = len(row)
+
                 if is_ru:
                     # --- RU legacy format (unchanged logic) ---
-                    name_raw = (row.get("Имя объекта") or "").strip()
-                    ip_str = (row.get("ip") or "").strip()
-                    mask_str = (row.get("mask") or "").strip()
+                    name_raw = row[name_i].strip() if name_i < n else ""
+                    ip_str = row[ip_i].strip() if ip_i < n else ""
+                    mask_str = row[mask_i].strip() if mask_i < n else ""
 
                     if not name_raw or not ip_str:
                         continue
 
-                    try:
-                        ip_obj = ipaddress.ip_address(ip_str)
-                    except ValueError:
+                    parsed = _parse_ip_int(ip_str)
+                    if parsed is None:
                         continue
+                    version, ip_int = parsed
+                    bits = _ADDR_BITS[version]
 
                     if not mask_str:
-                        prefix = 32 if isinstance(ip_obj, ipaddress.IPv4Address) else 128
+                        prefix = bits
                     else:
                         try:
                             prefix = self._mask_to_prefix(mask_str)
                         except Exception:
                             continue
 
-                    try:
-                        network = ipaddress.ip_network(f"{ip_str}/{prefix}", strict=False)
-                    except ValueError:
-                        continue
-
+                    net_int = ip_int & _prefix_mask(prefix, bits)
                     name_norm = self._normalize_name(name_raw)
 
-                    if (network.version == 4 and network.prefixlen == 32) or (
-                            network.version == 6 and network.prefixlen == 128
-                    ):
+                    if prefix == bits:
                         name_to_ref[name_norm] = ip_str
                     else:
                         name_to_ref.setdefault(
                             name_norm,
-                            f"{network.network_address}/{network.prefixlen}",
+                            f"{_int_to_ip_str(version, net_int)}/{prefix}",
                         )
 
-                    networks.append((network, name_raw))
+                    networks.append((version, net_int, prefix, name_raw))
 
                 else:
                     # --- EN new format: name from "name", network/ref from "cidr" ---
-                    name_raw = (row.get("name") or "").strip()
-                    cidr_str = (row.get("cidr") or "").strip()
+                    name_raw = row[name_i].strip() if name_i < n else ""
+                    cidr_str = row[cidr_i].strip() if cidr_i < n else ""
 
                     if not name_raw or not cidr_str:
                         continue
 
-                    try:
-                        network = ipaddress.ip_network(cidr_str, strict=False)
-                    except ValueError:
+                    network = _parse_network(cidr_str)
+                    if network is None:
                         continue
 
                     # IP -> name fallback
-                    networks.append((network, name_raw))
+                    networks.append((*network, name_raw))
 
                     # name -> ref fallback
                     name_to_ref[self._normalize_name(name_raw)] = cidr_str
 
-            networks.sort(key=lambda x: x[0].prefixlen, reverse=True)
-            self._networks = networks
+            tables = self._build_prefix_tables(networks)
+            self._tables_v4 = tables.get(4, [])
+            self._tables_v6 = tables.get(6, [])
             self._name_to_ref = name_to_ref
+            self._ip_name_cache.clear()
+            self._name_ref_cache.clear()
+
+    @staticmethod
+    def _build_prefix_tables(
+            networks: List[_Network],
+    ) -> Dict[int, List[Tuple[int, Dict[int, str]]]]:
+        """
+        Group networks into one hash table per prefix length.
+
+        Longest-prefix match is then one dict probe per distinct prefix
+        length (at most 33 for IPv4) instead of a scan over all networks.
+        For duplicate networks the first row in the file wins.
+        """
+        by_version: Dict[int, Dict[int, Dict[int, str]]] = {}
+        for version, net_int, prefix, name in networks:
+            table = by_version.setdefault(version, {}).setdefault(prefix, {})
+            table.setdefault(net_int, name)
+
+        tables: Dict[int, List[Tuple[int, Dict[int, str]]]] = {}
+        for version, by_prefix in by_version.items():
+            bits = _ADDR_BITS[version]
+            tables[version] = [
+                (_prefix_mask(prefix, bits), by_prefix[prefix])
+                for prefix in sorted(by_prefix, reverse=True)
+            ]
+        return tables
 
     def find_name_for_ip(self, ip_str: str) -> Optional[str]:
-        """IP -> object name by IP-in-network."""
-        try:
-            ip_obj = ipaddress.ip_address(ip_str)
-        except ValueError:
+        """IP -> object name by IP-in-network (memoized per IP string)."""
+        if ip_str in self._ip_name_cache:
+            return self._ip_name_cache[ip_str]
+
+        name = self._lookup_ip(ip_str)
+        self._ip_name_cache[ip_str] = name
+        return name
+
+    def _lookup_ip(self, ip_str: str) -> Optional[str]:
+        parsed = _parse_ip_int(ip_str)
+        if parsed is None:
             return None
 
-        for network, name in self._networks:
-            if network.version != ip_obj.version:
-                continue
-            if ip_obj in network:
+        version, ip_int = parsed
+        tables = self._tables_v4 if version == 4 else self._tables_v6
+        for mask, table in tables:
+            name = table.get(ip_int & mask)
+            if name is not None:
                 return name
         return None
 
     def find_ref_for_name(self, name: str) -> Optional[str]:
-        """Exact name (case-insensitive) -> ref (ip or cidr)."""
-        return self._name_to_ref.get(self._normalize_name(name))
+        """Exact name (case-insensitive) -> ref (ip or cidr), memoized per raw name."""
+        if name in self._name_ref_cache:
+            return self._name_ref_cache[name]
+
+        ref = self._name_to_ref.get(self._normalize_name(name))
+        self._name_ref_cache[name] = ref
+        return ref
 
 
 class DnsResolver:
@@ -191,11 +314,7 @@ class DnsResolver:
 
     @staticmethod
     def is_ip(value: str) -> bool:
-        try:
-            ipaddress.ip_address(value)
-            return True
-        except ValueError:
-            return False
+        return _parse_ip_int(value) is not None
 
     def _dns_ptr(self, ip_str: str) -> Optional[str]:
         if ip_str in self._ip_to_name:
@@ -220,6 +339,51 @@ class DnsResolver:
             self._name_to_ip[name] = None
             return None
 
+    def prefetch(
+            self,
+            tokens: Iterable[str],
+            max_workers: int = 64,
+            progress: Optional[Callable[[int, int], None]] = None,
+    ) -> None:
+        """
+        Warm DNS caches for many tokens concurrently.
+
+        Lookups are network-bound, so unique IPs/names are resolved in a
+        thread pool; later resolve_token() calls become cache hits. Each
+        unique token is looked up by exactly one worker, so the cache dicts
+        only ever see single-key writes from distinct threads.
+
+        Args:
+            tokens (Iterable[str]): IP or hostname strings (duplicates allowed).
+            max_workers (int): Maximum concurrent DNS lookups.
+            progress (Callable[[int, int], None] | None): Called as
+                progress(done, total) from the calling thread as lookups finish.
+        """
+        ips: Set[str] = set()
+        names: Set[str] = set()
+        for token in tokens:
+            cleaned = token.strip()
+            if not cleaned:
+                continue
+            if self.is_ip(cleaned):
+                if cleaned not in self._ip_to_name:
+                    ips.add(cleaned)
+            elif cleaned not in self._name_to_ip:
+                names.add(cleaned)
+
+        jobs: List[Tuple[Callable[[str], Optional[str]], str]] = (
+            [(self._dns_ptr, ip) for ip in ips] + [(self._dns_a, name) for name in names]
+        )
+        if not jobs:
+            return
+
+        total = len(jobs)
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, total))) as pool:
+            futures = [pool.submit(fn, arg) for fn, arg in jobs]
+            for done, _ in enumerate(as_completed(futures), start=1):
+                if progress is not None:
+                    progress(done, total)
+
     def resolve_token(self, token: str) -> ResolveResult:
         """
         Resolve token to name[ip] (or name[ref]) with 2-pass logic.
@@ -260,7 +424,7 @@ class DnsResolver:
 
 def split_tokens(value: str) -> List[str]:
     """Split comma-separated cell string into tokens."""
-    return [t.strip() for t in value.split(",") if t.strip()]
+    return list(filter(None, map(str.strip, value.split(","))))
 
 
 def resolve_cell(value: str, resolver: DnsResolver) -> str:
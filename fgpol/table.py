@@ -4,9 +4,10 @@ Console table rendering.
 
 from __future__ import annotations
 
+import sys
 from typing import Dict, List, Tuple
 
-from fgpol.fields import render_value
+from fgpol.fields import compute_renderers
 
 
 def print_table(rows: List[Dict], columns: List[Tuple[str, str]], max_width: int = 80) -> None:
@@ -19,16 +20,15 @@ def print_table(rows: List[Dict], columns: List[Tuple[str, str]], max_width: int
         max_width (int): Maximum width of a column before clipping.
     """
     headers = [h for h, _ in columns]
-    keys = [k for _, k in columns]
+    renderers = compute_renderers(columns)
 
-    matrix: List[List[str]] = [[render_value(r, k) for k in keys] for r in rows]
+    matrix: List[List[str]] = [[render(r) for render in renderers] for r in rows]
 
-    widths: List[int] = []
-    for i, header in enumerate(headers):
-        w = len(header)
-        for row in matrix:
-            w = max(w, len(row[i]))
-        widths.append(min(w, max_width))
+    cols = list(zip(*matrix)) if matrix else [() for _ in headers]
+    widths: List[int] = [
+        min(max_width, max(len(h), max(map(len, col), default=0)))
+        for h, col in zip(headers, cols)
+    ]
 
     def clip(text: str, width: int) -> str:
         if len(text) <= width:
@@ -37,12 +37,13 @@ def print_table(rows: List[Dict], columns: List[Tuple[str, str]], max_width: int
             return text[:width]
         return text[: width - 1] + "…"
 
-    header_line = " | ".join(clip(headers[i], widths[i]).ljust(widths[i]) for i in range(len(headers)))
-    sep_line = "-+-".join("-" * widths[i] for i in range(len(headers)))
+    # One format template for every line; cells are clipped once, then padded by format().
+    row_fmt = " | ".join(f"{{:<{w}}}" for w in widths)
 
-    print(header_line)
-    print(sep_line)
+    lines: List[str] = [
+        row_fmt.format(*[clip(h, w) for h, w in zip(headers, widths)]),
+        "-+-".join("-" * w for w in widths),
+    ]
+    lines.extend(row_fmt.format(*[clip(c, w) for c, w in zip(row, widths)]) for row in matrix)
 
-    for row in matrix:
-        line = " | ".join(clip(row[i], widths[i]).ljust(widths[i]) for i in range(len(headers)))
-        print(line)
+    sys.stdout.write("\n".join(lines) + "\n")
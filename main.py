@@ -24,7 +24,9 @@ def main() -> int:
             timeout=cfg.timeout_seconds,
         )
 
-        payload = client.get(
+        # paged fetch is opt-in (FGT_PAGINATE) until verified on more devices
+        fetch = client.get_all if cfg.paginate else client.get
+        payload = fetch(
             "/cmdb/firewall/policy",
             params=cfg.to_query_params(),
             debug=cfg.debug,
@@ -14,119 +14,38 @@ Config is loaded strictly from .env in project root.
 
 from __future__ import annotations
 
-import csv
-import json
-import warnings
-import ipaddress
+import sys
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-
-import requests
-from urllib3.exceptions import InsecureRequestWarning
-
-warnings.simplefilter("ignore", InsecureRequestWarning)
-
-
-# -----------------------------
-# .env parsing (no os.environ)
-# -----------------------------
-def parse_dotenv(path: str) -> Dict[str, str]:
-    """Parse simple KEY=VALUE .env file."""
-    data: Dict[str, str] = {}
-    with open(path, "r", encoding="utf-8") as f:
-        for line_no, raw in enumerate(f, start=1):
-            line = raw.strip()
-            if not line or line.startswith("#"):
-                continue
-            if "=" not in line:
-                raise ValueError(f"Malformed .env line {line_no}: {raw!r}")
-            key, value = line.split("=", 1)
-            key = key.strip()
-            value = value.strip()
-            if not key:
-                raise ValueError(f"Empty key in .env line {line_no}")
-            if (value.startswith('"') and value.endswith('"')) or (
-                    value.startswith("'") and value.endswith("'")
-            ):
-                value = value[1:-1]
-            data[key] = value
-    return data
-
-
-def to_bool(value: Optional[str], default: bool) -> bool:
-    if value is None or value == "":
-        return default
-    return value.strip().lower() in ("1", "true", "yes", "y", "on")
-
-
-def to_int(value: Optional[str], default: int) -> int:
-    if value is None or value == "":
-        return default
-    return int(value)
-
-
-def to_str(value: Optional[str]) -> Optional[str]:
-    if value is None:
-        return None
-    v = value.strip()
-    return v if v else None
-
-
-# -----------------------------
-# HTTP client
-# -----------------------------
-class FortiGateClient:
-    """Minimal FortiGate REST API client (token auth)."""
-
-    def __init__(self, base_url: str, token: str, verify_tls: bool, timeout: int) -> None:
-        self.base_url = base_url.rstrip("/")
-        self.verify_tls = verify_tls
-        self.timeout = timeout
-        self.session = requests.Session()
-        self.session.headers.update(
-            {"Authorization": f"Bearer {token}", "Accept": "application/json"}
-        )
-
-    def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """GET request, returns parsed JSON."""
-        url = f"{self.base_url}{path}"
-        try:
-            resp = self.session.get(
-                url,
-                params=params or {},
-                timeout=self.timeout,
-                verify=self.verify_tls,
-            )
-            resp.raise_for_status()
-        except requests.RequestException as exc:
-            raise RuntimeError(f"HTTP request failed for {url}: {exc}") from exc
 
-        try:
-            return resp.json()
-        except json.JSONDecodeError as exc:
-            snippet = resp.text[:500] if resp.text else ""
-            raise RuntimeError(
-                f"Invalid JSON response from {url}: {exc}. Body: {snippet}"
-            ) from exc
-
-
-def extract_results(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Return payload['results'] safely."""
-    results = payload.get("results", [])
-    if isinstance(results, list):
-        return results
-    return []
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
 
+import ipaddress
+from typing import Any, Dict, Iterable, Optional, Sequence
 
-def ensure_dir(path: str) -> None:
-    """Create directory if missing."""
-    Path(path).mkdir(parents=True, exist_ok=True)
+from fgpol.client import FortiGateClient
+from fgpol.common import ensure_dir, row_getter, write_csv
+from fgpol.config import parse_dotenv, to_bool, to_int, to_str
+from fgpol.fortios import extract_results
 
 
-def safe_get(obj: Dict[str, Any], key: str) -> str:
-    """Get key from dict and normalize to str; handles missing keys."""
-    val = obj.get(key, "")
-    return str(val) if val is not None else ""
+def _ipv4_to_int(value: str) -> Optional[int]:
+    """Parse a strict dotted-quad IPv4 string into an int (None if not one)."""
+    octets = value.split(".")
+    if len(octets) != 4:
+        return None
+    result = 0
+    for octet in octets:
+        if not (octet.isascii() and octet.isdigit()) or len(octet) > 3:
+            return None
+        if len(octet) > 1 and octet[0] == "0":
+            return None
+        n = int(octet)
+        if n > 255:
+            return None
+        result = (result << 8) | n
+    return result
 
 
 def subnet_to_cidr(subnet: str) -> str:
@@ -135,6 +54,10 @@ def subnet_to_cidr(subnet: str) -> str:
 
     Example:
         "10.20.108.0 255.255.254.0" -> "10.20.108.0/23"
+
+    The common dotted netmask case is done with integer arithmetic and
+    invalid addresses are rejected up front; only other mask forms
+    (hostmasks etc.) go through ipaddress.
     """
     if not subnet:
         return ""
@@ -144,6 +67,20 @@ def subnet_to_cidr(subnet: str) -> str:
         return ""
 
     ip, mask = parts
+
+    ip_int = _ipv4_to_int(ip)
+    if ip_int is None:
+        # ipaddress would reject it too; skip the raise/catch
+        return ""
+
+    mask_int = _ipv4_to_int(mask)
+    if mask_int is not None:
+        host_bits = ~mask_int & 0xFFFFFFFF
+        if host_bits & (host_bits + 1) == 0:
+            net = ip_int & mask_int
+            prefix = 32 - host_bits.bit_length()
+            return f"{net >> 24}.{(net >> 16) & 0xFF}.{(net >> 8) & 0xFF}.{net & 0xFF}/{prefix}"
+
     try:
         net = ipaddress.IPv4Network(f"{ip}/{mask}", strict=False)
         return str(net)
@@ -151,18 +88,13 @@ def subnet_to_cidr(subnet: str) -> str:
         return ""
 
 
-def write_csv(path: Path, rows: List[Dict[str, Any]], fieldnames: List[str]) -> None:
-    """Write CSV with UTF-8 and header."""
-    with path.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
-
-
-def export_addresses_csv(addresses: List[Dict[str, Any]], output_path: Path) -> None:
+def export_addresses_csv(addresses: Iterable[Dict[str, Any]], output_path: Path) -> None:
     """
     Export address objects to CSV.
 
+    Rows are generated lazily while writing, so no second copy of the
+    address list is built.
+
     Fields:
       - name
       - type
@@ -174,22 +106,24 @@ def export_addresses_csv(addresses: List[Dict[str, Any]], output_path: Path) ->
       - comment
       - uuid
     """
-    rows: List[Dict[str, Any]] = []
-    for a in addresses:
-        subnet = safe_get(a, "subnet")
-        rows.append(
-            {
-                "name": safe_get(a, "name"),
-                "type": safe_get(a, "type"),
-                "subnet": subnet,
-                "cidr": subnet_to_cidr(subnet),
-                "fqdn": safe_get(a, "fqdn"),
-                "interface": safe_get(a, "interface"),
-                "associated_interface": safe_get(a, "associated-interface"),
-                "comment": safe_get(a, "comment"),
-                "uuid": safe_get(a, "uuid"),
-            }
-        )
+    get = row_getter(
+        "name", "type", "subnet", "fqdn", "interface", "associated-interface", "comment", "uuid"
+    )
+
+    def _rows() -> Iterable[Sequence[str]]:
+        for a in addresses:
+            name, typ, subnet, fqdn, interface, assoc_interface, comment, uuid = get(a)
+            yield (
+                name,
+                typ,
+                subnet,
+                subnet_to_cidr(subnet),
+                fqdn,
+                interface,
+                assoc_interface,
+                comment,
+                uuid,
+            )
 
     fieldnames = [
         "name",
@@ -202,7 +136,7 @@ def export_addresses_csv(addresses: List[Dict[str, Any]], output_path: Path) ->
         "comment",
         "uuid",
     ]
-    write_csv(output_path, rows, fieldnames)
+    write_csv(output_path, _rows(), fieldnames)
 
 
 def main() -> int:
@@ -16,152 +16,68 @@ Config is loaded strictly from .env in project root.
 
 from __future__ import annotations
 
-import csv
-import json
-from dataclasses import dataclass
+import sys
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
-
-import requests
-import warnings
-
-from urllib3.exceptions import InsecureRequestWarning
-
-warnings.simplefilter("ignore", InsecureRequestWarning)
-
-# -----------------------------
-# .env parsing (no os.environ)
-# -----------------------------
-def parse_dotenv(path: str) -> Dict[str, str]:
-    """Parse simple KEY=VALUE .env file."""
-    data: Dict[str, str] = {}
-    with open(path, "r", encoding="utf-8") as f:
-        for line_no, raw in enumerate(f, start=1):
-            line = raw.strip()
-            if not line or line.startswith("#"):
-                continue
-            if "=" not in line:
-                raise ValueError(f"Malformed .env line {line_no}: {raw!r}")
-            key, value = line.split("=", 1)
-            key = key.strip()
-            value = value.strip()
-            if not key:
-                raise ValueError(f"Empty key in .env line {line_no}")
-            if (value.startswith('"') and value.endswith('"')) or (
-                value.startswith("'") and value.endswith("'")
-            ):
-                value = value[1:-1]
-            data[key] = value
-    return data
-
-
-def to_bool(value: Optional[str], default: bool) -> bool:
-    if value is None or value == "":
-        return default
-    return value.strip().lower() in ("1", "true", "yes", "y", "on")
 
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
 
-def to_int(value: Optional[str], default: int) -> int:
-    if value is None or value == "":
-        return default
-    return int(value)
-
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
 
-def to_str(value: Optional[str]) -> Optional[str]:
-    if value is None:
-        return None
-    v = value.strip()
-    return v if v else None
+from fgpol.client import FortiGateClient
+from fgpol.common import ensure_dir, row_getter, safe_get, write_csv
+from fgpol.config import parse_dotenv, to_bool, to_int, to_str
+from fgpol.fortios import extract_results
 
 
 # -----------------------------
-# HTTP client
+# Port normalization
 # -----------------------------
-class FortiGateClient:
-    """Minimal FortiGate REST API client (token auth)."""
-
-    def __init__(self, base_url: str, token: str, verify_tls: bool, timeout: int) -> None:
-        self.base_url = base_url.rstrip("/")
-        self.verify_tls = verify_tls
-        self.timeout = timeout
-        self.session = requests.Session()
-        self.session.headers.update(
-            {"Authorization": f"Bearer {token}", "Accept": "application/json"}
-        )
-
-    def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """GET request, returns parsed JSON."""
-        url = f"{self.base_url}{path}"
-        try:
-            resp = self.session.get(
-                url, params=params or {}, timeout=self.timeout, verify=self.verify_tls
-            )
-            resp.raise_for_status()
-        except requests.RequestException as exc:
-            raise RuntimeError(f"HTTP request failed for {url}: {exc}") from exc
+_PORT_RE = re.compile(r"(\d+)(?:-(\d+))?")
 
-        try:
-            return resp.json()
-        except json.JSONDecodeError as exc:
-            snippet = resp.text[:500] if resp.text else ""
-            raise RuntimeError(f"Invalid JSON response from {url}: {exc}. Body: {snippet}") from exc
 
-
-def extract_results(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Return payload['results'] safely."""
-    results = payload.get("results", [])
-    if isinstance(results, list):
-        return results
-    return []
-
-
-# -----------------------------
-# Port normalization
-# -----------------------------
-def expand_port_tokens(ports: str, proto_tag: str) -> List[str]:
+def expand_ports(ports: str, proto_tag: str) -> str:
     """
-    Expand FortiGate port string into tokens with transport.
+    Expand FortiGate port string into space-separated tokens with transport.
 
     Examples:
-      "88 464" -> ["88/tcp", "464/tcp"]
-      "7000-7002" -> ["7000/tcp", "7001/tcp", "7002/tcp"]
+      "88 464" -> "88/tcp 464/tcp"
+      "7000-7002" -> "7000/tcp 7001/tcp 7002/tcp"
+
+    Ranges are joined in one str.join per range rather than formatting
+    one f-string per port.
 
     Args:
         ports (str): Raw portrange string (space-separated tokens).
         proto_tag (str): tcp/udp/udplite/sctp.
 
     Returns:
-        List[str]: Expanded tokens with suffix "/<proto_tag>".
+        str: Expanded tokens with suffix "/<proto_tag>", space-separated.
     """
     if not ports or not ports.strip():
-        return []
+        return ""
 
+    suffix = f"/{proto_tag}"
+    sep = f"{suffix} "
     out: List[str] = []
-    tokens = [t for t in ports.split() if t.strip()]
-
-    for t in tokens:
-        if "-" in t:
-            parts = t.split("-", 1)
-            if len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit():
-                start = int(parts[0])
-                end = int(parts[1])
-                if start <= end:
-                    out.extend([f"{p}/{proto_tag}" for p in range(start, end + 1)])
-                    continue
-
-        if t.isdigit():
-            out.append(f"{t}/{proto_tag}")
-        else:
-            # Keep unknown tokens, still attach proto tag for clarity
-            out.append(f"{t}/{proto_tag}")
 
-    return out
+    for t in ports.split():
+        m = _PORT_RE.fullmatch(t)
+        if m is not None and m.group(2) is not None:
+            start = int(m.group(1))
+            end = int(m.group(2))
+            if start <= end:
+                out.append(sep.join(map(str, range(start, end + 1))) + suffix)
+                continue
 
+        # single port, or unknown token (still tagged with proto for clarity)
+        out.append(t + suffix)
 
-def safe_get(obj: Dict[str, Any], key: str) -> str:
-    """Get key from dict and normalize to str; handles missing keys."""
-    val = obj.get(key, "")
-    return str(val) if val is not None else ""
+    return " ".join(out)
 
 
 # -----------------------------
@@ -177,35 +93,36 @@ class ServicePorts:
 
 
 # -----------------------------
-# Exporters
+# Main logic
 # -----------------------------
-def ensure_dir(path: str) -> None:
-    Path(path).mkdir(parents=True, exist_ok=True)
+SERVICE_FIELDNAMES = ["name", "protocol", "tcp_ports", "udp_ports", "udplite_ports", "sctp_ports"]
 
 
-def write_csv(path: Path, rows: List[Dict[str, Any]], fieldnames: List[str]) -> None:
-    """Write CSV with UTF-8 and header."""
-    with path.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
-
+def build_services(
+    services: List[Dict[str, Any]],
+) -> Tuple[Dict[str, ServicePorts], List[Tuple[str, ...]]]:
+    """
+    Expand ports of custom services once.
 
-# -----------------------------
-# Main logic
-# -----------------------------
-def build_services_map(services: List[Dict[str, Any]]) -> Dict[str, ServicePorts]:
-    """Build name -> ServicePorts map from custom services list."""
+    Returns:
+        Tuple[Dict[str, ServicePorts], List[Tuple[str, ...]]]:
+            name -> ServicePorts map (for group export) and CSV rows
+            (SERVICE_FIELDNAMES order) for the custom services export.
+    """
     svc_map: Dict[str, ServicePorts] = {}
+    rows: List[Tuple[str, ...]] = []
+
+    get = row_getter(
+        "name", "protocol", "tcp-portrange", "udp-portrange", "udplite-portrange", "sctp-portrange"
+    )
 
     for s in services:
-        name = safe_get(s, "name")
-        protocol = safe_get(s, "protocol")
+        name, protocol, tcp_range, udp_range, udpl_range, sctp_range = get(s)
 
-        tcp = " ".join(expand_port_tokens(safe_get(s, "tcp-portrange"), "tcp"))
-        udp = " ".join(expand_port_tokens(safe_get(s, "udp-portrange"), "udp"))
-        udpl = " ".join(expand_port_tokens(safe_get(s, "udplite-portrange"), "udplite"))
-        sctp = " ".join(expand_port_tokens(safe_get(s, "sctp-portrange"), "sctp"))
+        tcp = expand_ports(tcp_range, "tcp")
+        udp = expand_ports(udp_range, "udp")
+        udpl = expand_ports(udpl_range, "udplite")
+        sctp = expand_ports(sctp_range, "sctp")
 
         svc_map[name] = ServicePorts(
             protocol=protocol,
@@ -214,34 +131,17 @@ def build_services_map(services: List[Dict[str, Any]]) -> Dict[str, ServicePorts
             udplite_ports=udpl,
             sctp_ports=sctp,
         )
+        rows.append((name, protocol, tcp, udp, udpl, sctp))
 
-    return svc_map
+    return svc_map, rows
 
 
 def export_custom_services_csv(
-    services: List[Dict[str, Any]],
+    rows: List[Tuple[str, ...]],
     output_path: Path,
 ) -> None:
-    """Export custom services with normalized ports to CSV."""
-    rows: List[Dict[str, Any]] = []
-    for s in services:
-        name = safe_get(s, "name")
-        protocol = safe_get(s, "protocol")
-
-        row = {
-            "name": name,
-            "protocol": protocol,
-            "tcp_ports": " ".join(expand_port_tokens(safe_get(s, "tcp-portrange"), "tcp")),
-            "udp_ports": " ".join(expand_port_tokens(safe_get(s, "udp-portrange"), "udp")),
-            "udplite_ports": " ".join(
-                expand_port_tokens(safe_get(s, "udplite-portrange"), "udplite")
-            ),
-            "sctp_ports": " ".join(expand_port_tokens(safe_get(s, "sctp-portrange"), "sctp")),
-        }
-        rows.append(row)
-
-    fieldnames = ["name", "protocol", "tcp_ports", "udp_ports", "udplite_ports", "sctp_ports"]
-    write_csv(output_path, rows, fieldnames)
+    """Export custom services with normalized ports (rows from build_services) to CSV."""
+    write_csv(output_path, rows, SERVICE_FIELDNAMES)
 
 
 def export_service_groups_with_ports_csv(
@@ -250,7 +150,7 @@ def export_service_groups_with_ports_csv(
     output_path: Path,
 ) -> None:
     """Export service groups with ports (joined from svc_map)."""
-    rows: List[Dict[str, Any]] = []
+    rows: List[Tuple[str, ...]] = []
 
     for g in groups:
         group_name = safe_get(g, "name")
@@ -267,18 +167,21 @@ def export_service_groups_with_ports_csv(
                 member_name = str(m)
 
             svc = svc_map.get(member_name)
-            rows.append(
-                {
-                    "group_name": group_name,
-                    "member_name": member_name,
-                    "protocol": svc.protocol if svc else "",
-                    "tcp_ports": svc.tcp_ports if svc else "",
-                    "udp_ports": svc.udp_ports if svc else "",
-                    "udplite_ports": svc.udplite_ports if svc else "",
-                    "sctp_ports": svc.sctp_ports if svc else "",
-                    "note": "" if svc else "not_found_in_custom_services",
-                }
-            )
+            if svc:
+                rows.append(
+                    (
+                        group_name,
+                        member_name,
+                        svc.protocol,
+                        svc.tcp_ports,
+                        svc.udp_ports,
+                        svc.udplite_ports,
+                        svc.sctp_ports,
+                        "",
+                    )
+                )
+            else:
+                rows.append((group_name, member_name, "", "", "", "", "", "not_found_in_custom_services"))
 
     fieldnames = [
         "group_name",
@@ -323,23 +226,28 @@ def main() -> int:
 
         params = {"vdom": vdom}
 
+        # Both endpoints are independent: fetch them concurrently over the pooled session.
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            svc_future = pool.submit(client.get, "/cmdb/firewall.service/custom", params=params)
+            grp_future = pool.submit(client.get, "/cmdb/firewall.service/group", params=params)
+            svc_payload = svc_future.result()
+            grp_payload = grp_future.result()
+
         # --- Custom services ---
-        svc_payload = client.get("/cmdb/firewall.service/custom", params=params)
         services = extract_results(svc_payload)
+        svc_map, svc_rows = build_services(services)
         if not services:
             print("No custom services returned.")
         else:
             services_csv = Path(output_dir) / services_csv_name
-            export_custom_services_csv(services, services_csv)
+            export_custom_services_csv(svc_rows, services_csv)
             print(f"Custom services CSV: {services_csv}")
 
         # --- Service groups ---
-        grp_payload = client.get("/cmdb/firewall.service/group", params=params)
         groups = extract_results(grp_payload)
         if not groups:
             print("No service groups returned.")
         else:
-            svc_map = build_services_map(services)
             groups_csv = Path(output_dir) / groups_csv_name
             export_service_groups_with_ports_csv(groups, svc_map, groups_csv)
             print(f"Service groups CSV: {groups_csv}")
@@ -15,6 +15,9 @@ Extra:
   RESOLVE_DISPLAY_MODE=full|ip
     full: keep name[ip]
     ip: write only ip from brackets (fallback to original token if unknown)
+  RESOLVE_OUTPUT_FORMAT=csv|parquet
+    parquet: write <stem><suffix>.parquet instead (all columns as strings;
+             requires pyarrow)
 """
 
 from __future__ import annotations
@@ -29,46 +32,56 @@ if str(ROOT) not in sys.path:
 import csv
 import os
 import re
-import threading
 import time
 from datetime import datetime
-from typing import Dict, List
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Tuple
 
 from dotenv import load_dotenv
 
 from fgpol.config import load_config
-from fgpol.resolver import DnsResolver, FwObjectsLookup, resolve_cell
+from fgpol.resolver import DnsResolver, FwObjectsLookup, split_tokens
 
 # Make sure .env vars are available via os.getenv (load_config does not export them)
 load_dotenv(".env")
 
 
 class Spinner:
-    """Clean one-line spinner; avoids line wrapping by truncation."""
+    """
+    Clean one-line spinner; avoids line wrapping by truncation.
+
+    No background thread: the caller drives it with tick(), which repaints
+    at most once per INTERVAL seconds.
+    """
+
+    FRAMES = "\\|/-"
+    INTERVAL = 0.12
 
     def __init__(self, message: str = "Resolving") -> None:
         self.message = message
-        self._stop = threading.Event()
-        self._lock = threading.Lock()
-        self._current = ""
-        self._thread: threading.Thread | None = None
-
-    def set_current(self, text: str) -> None:
-        text = text.replace("\r", " ").replace("\n", " ")
-        with self._lock:
-            self._current = text
+        self._frame = 0
+        self._last_render = 0.0
+        self._active = False
 
     def start(self) -> None:
-        if self._thread and self._thread.is_alive():
+        self._active = True
+        self._last_render = 0.0
+
+    def tick(self, text: str = "") -> None:
+        if not self._active:
+            return
+        now = time.monotonic()
+        if now - self._last_render < self.INTERVAL:
             return
-        self._stop.clear()
-        self._thread = threading.Thread(target=self._run, daemon=True)
-        self._thread.start()
+        self._last_render = now
+
+        cur = text.replace("\r", " ").replace("\n", " ")
+        tail = f" — {cur}" if cur else ""
+        self._render(f"{self.message} [{self.FRAMES[self._frame % len(self.FRAMES)]}]{tail}")
+        self._frame += 1
 
     def stop(self) -> None:
-        self._stop.set()
-        if self._thread:
-            self._thread.join(timeout=1.0)
+        self._active = False
         self._clear_line()
 
     @staticmethod
@@ -91,24 +104,18 @@ class Spinner:
         print("\r" + (" " * width), end="", flush=True)
         print("\r" + line, end="", flush=True)
 
-    def _run(self) -> None:
-        frames = ["\\", "|", "/", "-"]
-        i = 0
-        while not self._stop.is_set():
-            with self._lock:
-                cur = self._current
-            tail = f" — {cur}" if cur else ""
-            self._render(f"{self.message} [{frames[i % len(frames)]}]{tail}")
-            i += 1
-            time.sleep(0.12)
-
 
 def _list_csv_candidates(output_dir: str) -> List[Path]:
-    out = Path(output_dir)
-    if not out.exists():
+    """*.csv files in output_dir, newest first (one scandir pass, cached DirEntry stats)."""
+    try:
+        with os.scandir(output_dir) as it:
+            entries = [(e.stat().st_mtime, e.path) for e in it if e.name.endswith(".csv") and e.is_file()]
+    except (FileNotFoundError, NotADirectoryError):
         return []
-    candidates = sorted(out.glob("*.csv"), key=lambda p: p.stat().st_mtime, reverse=True)
-    return [p for p in candidates if p.is_file()]
+
+    # stable sort on mtime only: ties keep directory order, as before
+    entries.sort(key=lambda item: item[0], reverse=True)
+    return [Path(path) for _, path in entries]
 
 
 def _select_csv_interactive(output_dir: str) -> Path:
@@ -146,10 +153,69 @@ def _pick_input_csv(output_dir: str, explicit: str | None, interactive: bool) ->
     if interactive:
         return _select_csv_interactive(output_dir)
 
-    candidates = _list_csv_candidates(output_dir)
-    if not candidates:
+    # newest *.csv in one pass; DirEntry caches file type/stat from the directory scan
+    newest = None
+    try:
+        with os.scandir(output_dir) as it:
+            newest = max(
+                (
+                    (e.stat().st_mtime, e.path)
+                    for e in it
+                    if e.name.endswith(".csv") and e.is_file()
+                ),
+                default=None,
+            )
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+
+    if newest is None:
         raise FileNotFoundError(f"No CSV files found in output dir: {output_dir}")
-    return candidates[0]
+    return Path(newest[1])
+
+
+# rows buffered per writer.writerows() call
+WRITE_BATCH_ROWS = 1024
+
+# rows per Parquet record batch
+PARQUET_BATCH_ROWS = 64 * 1024
+
+
+def _load_pyarrow() -> Tuple[Any, Any]:
+    """Import pyarrow lazily; only needed for RESOLVE_OUTPUT_FORMAT=parquet."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:  # optional dependency
+        raise RuntimeError("RESOLVE_OUTPUT_FORMAT=parquet requires pyarrow (pip install pyarrow).") from None
+    return pa, pq
+
+
+def _write_parquet(path: Path, header: List[str], rows: Iterable[List[str]]) -> None:
+    """Stream rows into a zstd-compressed Parquet file, all columns as strings."""
+    pa, pq = _load_pyarrow()
+    schema = pa.schema([(name, pa.string()) for name in header])
+    width = len(header)
+
+    def flush(batch: List[List[str]]) -> None:
+        # transpose the row batch into one string array per column
+        arrays = [pa.array(col, type=pa.string()) for col in zip(*batch)]
+        writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+
+    with pq.ParquetWriter(str(path), schema, compression="zstd", compression_level=3) as writer:
+        batch: List[List[str]] = []
+        for row in rows:
+            # every row must match the schema: pad short rows, drop cells
+            # beyond the header (no column to hold them)
+            if len(row) < width:
+                row = row + [""] * (width - len(row))
+            elif len(row) > width:
+                row = row[:width]
+            batch.append(row)
+            if len(batch) >= PARQUET_BATCH_ROWS:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
 
 
 def _parse_columns(value: str) -> List[str]:
@@ -172,12 +238,30 @@ def _to_ip_only(resolved_token: str, original_token: str) -> str:
     return inner
 
 
+# whole resolved cell made only of "name[inner]" tokens, e.g. "a[1.2.3.4], ?[10.0.0.1]"
+_RESOLVED_CELL_RE = re.compile(r"\s*[^,\[\]]*\[[^,\[\]]*\]\s*(?:,\s*[^,\[\]]*\[[^,\[\]]*\]\s*)*")
+_INNER_RE = re.compile(r"\[([^,\[\]]*)\]")
+
+
 def _apply_display_mode(original_cell: str, resolved_cell: str, mode: str) -> str:
     mode = (mode or "full").lower()
     if mode != "ip":
         return resolved_cell
 
     orig_tokens = [t.strip() for t in original_cell.split(",") if t.strip()]
+
+    if _RESOLVED_CELL_RE.fullmatch(resolved_cell):
+        # Fast path: one bracket pair per token, so all inners come from a
+        # single findall instead of a split + regex search per token.
+        inners = _INNER_RE.findall(resolved_cell)
+        if len(inners) <= len(orig_tokens):
+            ips = [
+                inner if inner and inner != "?" else orig_tokens[i]
+                for i, inner in enumerate(map(str.strip, inners))
+            ]
+            ips.extend(orig_tokens[len(inners):])
+            return ", ".join(ips)
+
     res_tokens = [t.strip() for t in resolved_cell.split(",") if t.strip()]
 
     out: List[str] = []
@@ -200,6 +284,13 @@ def main() -> int:
 
     interactive = os.getenv("RESOLVE_INTERACTIVE", "false").lower() == "true"
     display_mode = os.getenv("RESOLVE_DISPLAY_MODE", "full")
+    cache_stats = os.getenv("RESOLVE_CACHE_STATS", "false").lower() == "true"
+    output_format = os.getenv("RESOLVE_OUTPUT_FORMAT", "csv").strip().lower() or "csv"
+    if output_format not in ("csv", "parquet"):
+        raise ValueError(f"RESOLVE_OUTPUT_FORMAT must be csv or parquet, got: {output_format}")
+    if output_format == "parquet":
+        # fail before any DNS work if pyarrow is missing
+        _load_pyarrow()
 
     input_csv = _pick_input_csv(cfg.output_dir, cfg.resolve_input_csv, interactive)
     suffix = cfg.resolve_output_suffix or "_resolved"
@@ -218,41 +309,112 @@ def main() -> int:
     out_dir = Path(cfg.output_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    out_name = f"{input_csv.stem}{suffix}{input_csv.suffix}"
+    out_ext = ".parquet" if output_format == "parquet" else input_csv.suffix
+    out_name = f"{input_csv.stem}{suffix}{out_ext}"
     out_path = out_dir / out_name
 
     spinner = Spinner("Resolving")
     spinner.start()
     try:
-        with input_csv.open("r", encoding="utf-8", newline="") as fin:
-            reader = csv.DictReader(fin)
-            if not reader.fieldnames:
+        # Pass 1: validate the header and resolve all unique tokens
+        # concurrently; only the token set is kept in memory.
+        with input_csv.open("r", encoding="utf-8", newline="", buffering=1 << 20) as fin:
+            reader = csv.reader(fin)
+            header = next(reader, None)
+            if not header:
                 raise ValueError("CSV has no header row.")
 
-            missing = [c for c in columns_to_resolve if c not in reader.fieldnames]
+            missing = [c for c in columns_to_resolve if c not in header]
             if missing:
-                raise ValueError(f"Columns not found in CSV header: {missing}. Header: {reader.fieldnames}")
-
-            rows: List[Dict[str, str]] = []
+                raise ValueError(f"Columns not found in CSV header: {missing}. Header: {header}")
+
+            # (column name, index) resolved once; rows are plain lists
+            targets = [(c, header.index(c)) for c in columns_to_resolve]
+            width = len(header)
+
+            spinner.tick("prefetching DNS")
+            resolver.prefetch(
+                (
+                    t
+                    for row in reader
+                    for _, i in targets
+                    if i < len(row)
+                    for t in split_tokens(row[i])
+                ),
+                max_workers=cfg.resolve_dns_workers,
+                progress=lambda done, total: spinner.tick(f"DNS {done}/{total}"),
+            )
+
+        # Pass 2: stream rows through the (now warm) resolver to the output.
+        # Same cell values repeat heavily across rows (any, shared groups):
+        # resolve and format each distinct raw value once, and each distinct
+        # token once across all cells it appears in.
+        cell_cache: Dict[str, str] = {}
+
+        @lru_cache(maxsize=None)
+        def resolve_token(token: str) -> str:
+            return resolver.resolve_token(token).display
+
+        def resolved_rows(reader) -> Iterable[List[str]]:
             for row in reader:
-                for col in columns_to_resolve:
-                    val = (row.get(col) or "").strip()
-                    if val:
-                        short = val if len(val) <= 80 else (val[:80] + "…")
-                        spinner.set_current(f"{col}={short}")
-
-                        resolved = resolve_cell(val, resolver)
-                        row[col] = _apply_display_mode(val, resolved, display_mode)
-                rows.append(row)
+                if not row:
+                    continue
+                if len(row) < width:
+                    # short rows are padded, as DictReader/DictWriter did
+                    row.extend([""] * (width - len(row)))
+
+                for col, i in targets:
+                    raw = row[i]
+                    if not raw:
+                        continue
+                    out = cell_cache.get(raw)
+                    if out is None:
+                        val = raw.strip()
+                        if val:
+                            # status text only every 256 new cells; tick()
+                            # itself repaints at most every 0.12 s
+                            if (len(cell_cache) & 0xFF) == 0:
+                                short = val if len(val) <= 80 else (val[:80] + "…")
+                                spinner.tick(f"{col}={short}")
+
+                            if "," in val:
+                                resolved = ", ".join(map(resolve_token, split_tokens(val)))
+                            else:
+                                # single token: no tokenizer pass or list needed
+                                resolved = resolve_token(val)
+                            out = _apply_display_mode(val, resolved, display_mode)
+                        else:
+                            out = raw
+                        cell_cache[raw] = out
+                    row[i] = out
+                yield row
+
+        with input_csv.open("r", encoding="utf-8", newline="", buffering=1 << 20) as fin:
+            reader = csv.reader(fin)
+            out_header = next(reader)
+
+            if output_format == "parquet":
+                _write_parquet(out_path, out_header, resolved_rows(reader))
+            else:
+                with out_path.open("w", encoding="utf-8", newline="", buffering=1 << 20) as fout:
+                    writer = csv.writer(fout)
+                    writer.writerow(out_header)
+                    buf: List[List[str]] = []
+                    for row in resolved_rows(reader):
+                        buf.append(row)
+                        if len(buf) >= WRITE_BATCH_ROWS:
+                            writer.writerows(buf)
+                            buf.clear()
+                    writer.writerows(buf)
     finally:
         spinner.stop()
 
-    with out_path.open("w", encoding="utf-8", newline="") as fout:
-        writer = csv.DictWriter(fout, fieldnames=reader.fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
+    if cache_stats:
+        info = resolve_token.cache_info()
+        print(f"Token cache: {info.hits} hits, {info.misses} misses; {len(cell_cache)} distinct cells")
 
-    print(f"Resolved CSV written: {out_path}")
+    kind = "Parquet" if output_format == "parquet" else "CSV"
+    print(f"Resolved {kind} written: {out_path}")
     return 0
 
 
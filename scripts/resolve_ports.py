@@ -31,6 +31,7 @@ import csv
 import os
 import sys
 from datetime import datetime
+from itertools import groupby
 from pathlib import Path
 from typing import Dict, List, Optional, Set
 
@@ -38,17 +39,19 @@ from dotenv import load_dotenv
 
 load_dotenv(".env")
 
-# allow very large CSV fields (RPC ranges etc.)
-try:
-    csv.field_size_limit(sys.maxsize)
-except OverflowError:
-    csv.field_size_limit(10_000_000)
+# allow very large CSV fields (RPC ranges etc.); 2**31 - 1 fits a C long
+# on every platform, so no OverflowError probing is needed
+csv.field_size_limit(2**31 - 1)
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 
+# rows buffered per writer.writerows() call
+WRITE_BATCH_ROWS = 1024
+
+
 def _parse_columns(value: str | None) -> List[str]:
     if not value:
         raise ValueError("PORTS_RESOLVE_COLUMNS is empty. Example: PORTS_RESOLVE_COLUMNS=service")
@@ -59,49 +62,28 @@ def _parse_columns(value: str | None) -> List[str]:
 
 
 def _split_tokens(cell: str) -> List[str]:
-    # comma-separated tokens (same as resolve_name.py)
-    return [t.strip() for t in cell.split(",") if t.strip()]
+    # comma-separated tokens (same as resolve_name.py); each token is
+    # stripped once, empties dropped by filter
+    return list(filter(None, map(str.strip, cell.split(","))))
 
 
-def compress_ports(port_tokens: List[str]) -> List[str]:
+def _compress_from_bins(by_proto: Dict[str, Set[int]], passthrough: List[str]) -> List[str]:
     """
-    Compress sequential numeric ports per proto:
-      ["4001/tcp","4002/tcp","4003/tcp","53/udp","4010/tcp"]
-    -> ["4001-4003/tcp","4010/tcp","53/udp"]
+    Collapse per-proto port sets into runs, add passthrough tokens, sort:
+      {"tcp": {4001, 4002, 4003, 4010}, "udp": {53}}
+    -> ["4001-4003/tcp", "4010/tcp", "53/udp"]
     """
-    by_proto: Dict[str, List[int]] = {}
-    passthrough: List[str] = []
-
-    for tok in port_tokens:
-        tok = tok.strip()
-        if not tok:
-            continue
-        if "/" not in tok:
-            passthrough.append(tok)
-            continue
-
-        port_part, proto = tok.rsplit("/", 1)
-        if port_part.isdigit():
-            by_proto.setdefault(proto, []).append(int(port_part))
-        else:
-            passthrough.append(tok)
-
     out: List[str] = []
 
     for proto, ports in by_proto.items():
-        ports = sorted(set(ports))
-        i = 0
-        while i < len(ports):
-            start = ports[i]
-            end = start
-            while i + 1 < len(ports) and ports[i + 1] == end + 1:
-                i += 1
-                end = ports[i]
+        # consecutive ports share (value - position) in the sorted list
+        for _, run in groupby(enumerate(sorted(ports)), key=lambda iv: iv[1] - iv[0]):
+            values = [v for _, v in run]
+            start, end = values[0], values[-1]
             if start == end:
                 out.append(f"{start}/{proto}")
             else:
                 out.append(f"{start}-{end}/{proto}")
-            i += 1
 
     out.extend(passthrough)
 
@@ -116,23 +98,33 @@ def compress_ports(port_tokens: List[str]) -> List[str]:
 
 
 def _join_ports(parts: List[str]) -> str:
-    tokens: List[str] = []
+    """
+    Merge whitespace-separated port strings into one compressed string.
+
+    Single pass: tokens are deduplicated and binned per proto as they are
+    read, then handed to _compress_from_bins.
+    """
+    by_proto: Dict[str, Set[int]] = {}
+    passthrough: List[str] = []
+    passthrough_seen: Set[str] = set()
+
     for p in parts:
         if not p:
             continue
         for t in str(p).split():
-            if t:
-                tokens.append(t)
+            if "/" in t:
+                port_part, proto = t.rsplit("/", 1)
+                if port_part.isdigit():
+                    by_proto.setdefault(proto, set()).add(int(port_part))
+                    continue
+            if t not in passthrough_seen:
+                passthrough_seen.add(t)
+                passthrough.append(t)
+
+    return " ".join(_compress_from_bins(by_proto, passthrough))
 
-    seen: Set[str] = set()
-    uniq: List[str] = []
-    for t in tokens:
-        if t not in seen:
-            seen.add(t)
-            uniq.append(t)
 
-    compressed = compress_ports(uniq)
-    return " ".join(compressed)
+_PORT_COLUMNS = ("tcp_ports", "udp_ports", "udplite_ports", "sctp_ports")
 
 
 def load_services_table(path: Path) -> Dict[str, str]:
@@ -141,27 +133,27 @@ def load_services_table(path: Path) -> Dict[str, str]:
         raise FileNotFoundError(f"Services CSV not found: {path}")
 
     m: Dict[str, str] = {}
-    with path.open("r", encoding="utf-8-sig", newline="") as f:
-        r = csv.DictReader(f)
-        if not r.fieldnames:
+    with path.open("r", encoding="utf-8-sig", newline="", buffering=1 << 20) as f:
+        r = csv.reader(f)
+        header = next(r, None)
+        if not header:
             return m
 
-        required = {"name", "tcp_ports", "udp_ports", "udplite_ports", "sctp_ports"}
-        if not required.issubset(set(r.fieldnames)):
-            raise ValueError(f"Services CSV must contain columns {sorted(required)}. Found: {r.fieldnames}")
+        required = {"name", *_PORT_COLUMNS}
+        if not required.issubset(header):
+            raise ValueError(f"Services CSV must contain columns {sorted(required)}. Found: {header}")
+
+        # last duplicate column wins, as with DictReader
+        col = {c: i for i, c in enumerate(header)}
+        name_idx = col["name"]
+        port_idx = [col[c] for c in _PORT_COLUMNS]
 
         for row in r:
-            name = (row.get("name") or "").strip()
+            n = len(row)
+            name = (row[name_idx] if name_idx < n else "").strip()
             if not name:
                 continue
-            ports = _join_ports(
-                [
-                    row.get("tcp_ports") or "",
-                    row.get("udp_ports") or "",
-                    row.get("udplite_ports") or "",
-                    row.get("sctp_ports") or "",
-                    ]
-            )
+            ports = _join_ports([row[i] if i < n else "" for i in port_idx])
             m[name] = ports
 
     return m
@@ -173,27 +165,27 @@ def load_groups_table(path: Path) -> Dict[str, str]:
         raise FileNotFoundError(f"Service groups CSV not found: {path}")
 
     tmp: Dict[str, List[str]] = {}
-    with path.open("r", encoding="utf-8-sig", newline="") as f:
-        r = csv.DictReader(f)
-        if not r.fieldnames:
+    with path.open("r", encoding="utf-8-sig", newline="", buffering=1 << 20) as f:
+        r = csv.reader(f)
+        header = next(r, None)
+        if not header:
             return {}
 
-        required = {"group_name", "tcp_ports", "udp_ports", "udplite_ports", "sctp_ports"}
-        if not required.issubset(set(r.fieldnames)):
-            raise ValueError(f"Groups CSV must contain columns {sorted(required)}. Found: {r.fieldnames}")
+        required = {"group_name", *_PORT_COLUMNS}
+        if not required.issubset(header):
+            raise ValueError(f"Groups CSV must contain columns {sorted(required)}. Found: {header}")
+
+        # last duplicate column wins, as with DictReader
+        col = {c: i for i, c in enumerate(header)}
+        group_idx = col["group_name"]
+        port_idx = [col[c] for c in _PORT_COLUMNS]
 
         for row in r:
-            g = (row.get("group_name") or "").strip()
+            n = len(row)
+            g = (row[group_idx] if group_idx < n else "").strip()
             if not g:
                 continue
-            ports = _join_ports(
-                [
-                    row.get("tcp_ports") or "",
-                    row.get("udp_ports") or "",
-                    row.get("udplite_ports") or "",
-                    row.get("sctp_ports") or "",
-                    ]
-            )
+            ports = _join_ports([row[i] if i < n else "" for i in port_idx])
             if ports:
                 tmp.setdefault(g, []).append(ports)
 
@@ -203,31 +195,44 @@ def load_groups_table(path: Path) -> Dict[str, str]:
     return out
 
 
-def resolve_service_token(token: str, svc_map: Dict[str, str], grp_map: Dict[str, str]) -> str:
-    ports = svc_map.get(token)
-    if ports is not None:
-        return f"{token}({ports})" if ports else f"{token}()"
-
-    gports = grp_map.get(token)
-    if gports is not None:
-        return f"{token}({gports})" if gports else f"{token}()"
-
-    return token
+def build_display_map(svc_map: Dict[str, str], grp_map: Dict[str, str]) -> Dict[str, str]:
+    """
+    token -> "name(ports)" for every known service/group, built once.
 
+    Services shadow groups of the same name; unknown tokens are left as-is
+    by the caller (display.get(t, t)).
+    """
+    display = {n: f"{n}({p})" for n, p in grp_map.items()}
+    display.update({n: f"{n}({p})" for n, p in svc_map.items()})
+    return display
 
-def _list_csv_candidates(output_dir: str) -> List[Path]:
-    out = Path(output_dir)
-    if not out.exists():
-        return []
 
-    # exclude truth tables so we don't accidentally "resolve" them
-    exclude = {
+# exclude truth tables so we don't accidentally "resolve" them
+_TRUTH_TABLES = frozenset(
+    {
         "firewall_services_custom.csv",
         "firewall_service_groups_with_ports.csv",
     }
+)
+
+
+def _list_csv_candidates(output_dir: str) -> List[Path]:
+    """*.csv files in output_dir, newest first (one scandir pass, cached DirEntry stats)."""
+    try:
+        with os.scandir(output_dir) as it:
+            entries = [
+                (e.stat().st_mtime, e.path)
+                for e in it
+                if e.name.endswith(".csv")
+                and e.name not in _TRUTH_TABLES
+                and e.is_file()
+            ]
+    except (FileNotFoundError, NotADirectoryError):
+        return []
 
-    candidates = sorted(out.glob("*.csv"), key=lambda p: p.stat().st_mtime, reverse=True)
-    return [p for p in candidates if p.is_file() and p.name not in exclude]
+    # stable sort on mtime only: ties keep directory order, as before
+    entries.sort(key=lambda item: item[0], reverse=True)
+    return [Path(path) for _, path in entries]
 
 
 def _select_csv_interactive(output_dir: str) -> Path:
@@ -265,10 +270,26 @@ def _pick_input_csv(output_dir: str, explicit: str | None, interactive: bool) ->
     if interactive:
         return _select_csv_interactive(output_dir)
 
-    candidates = _list_csv_candidates(output_dir)
-    if not candidates:
+    # newest *.csv in one pass; DirEntry caches file type/stat from the directory scan
+    newest = None
+    try:
+        with os.scandir(output_dir) as it:
+            newest = max(
+                (
+                    (e.stat().st_mtime, e.path)
+                    for e in it
+                    if e.name.endswith(".csv")
+                    and e.name not in _TRUTH_TABLES
+                    and e.is_file()
+                ),
+                default=None,
+            )
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+
+    if newest is None:
         raise FileNotFoundError(f"No CSV files found in output dir: {output_dir}")
-    return candidates[0]
+    return Path(newest[1])
 
 
 def main() -> int:
@@ -303,30 +324,58 @@ def main() -> int:
     out_name = f"{input_csv.stem}{suffix}{input_csv.suffix}"
     out_path = out_dir / out_name
 
-    with input_csv.open("r", encoding="utf-8", newline="") as fin:
-        reader = csv.DictReader(fin)
-        if not reader.fieldnames:
+    with input_csv.open("r", encoding="utf-8", newline="", buffering=1 << 20) as fin:
+        reader = csv.reader(fin)
+        header = next(reader, None)
+        if not header:
             raise ValueError("CSV has no header row.")
 
-        missing = [c for c in columns_to_resolve if c not in reader.fieldnames]
+        missing = [c for c in columns_to_resolve if c not in header]
         if missing:
-            raise ValueError(f"Columns not found in CSV header: {missing}. Header: {reader.fieldnames}")
+            raise ValueError(f"Columns not found in CSV header: {missing}. Header: {header}")
+
+        display = build_display_map(svc_map, grp_map)
+
+        col_idx = {c: i for i, c in enumerate(header)}
+        target_idx = [col_idx[c] for c in columns_to_resolve]
+        width = len(header)
+
+        # Service cells repeat heavily across rows: resolve each distinct raw
+        # value once, the whole column then costs one dict probe per cell.
+        cell_cache: Dict[str, str] = {}
+
+        # stream: resolved rows are written out in small batches
+        with out_path.open("w", encoding="utf-8", newline="", buffering=1 << 20) as fout:
+            writer = csv.writer(fout)
+            writer.writerow(header)
+            buf: List[List[str]] = []
 
-        rows: List[Dict[str, str]] = []
-        for row in reader:
-            for col in columns_to_resolve:
-                cell = (row.get(col) or "").strip()
-                if not cell:
+            for row in reader:
+                if not row:
                     continue
-                tokens = _split_tokens(cell)
-                resolved = [resolve_service_token(t, svc_map, grp_map) for t in tokens]
-                row[col] = ", ".join(resolved)
-            rows.append(row)
-
-    with out_path.open("w", encoding="utf-8", newline="") as fout:
-        writer = csv.DictWriter(fout, fieldnames=reader.fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
+                if len(row) < width:
+                    # short rows are padded, as DictReader/DictWriter did
+                    row.extend([""] * (width - len(row)))
+
+                for i in target_idx:
+                    raw = row[i]
+                    out = cell_cache.get(raw)
+                    if out is None:
+                        cell = raw.strip()
+                        if not cell:
+                            out = raw
+                        elif "," not in cell:
+                            # single token: no tokenizer pass or list needed
+                            out = display.get(cell, cell)
+                        else:
+                            out = ", ".join([display.get(t, t) for t in _split_tokens(cell)])
+                        cell_cache[raw] = out
+                    row[i] = out
+                buf.append(row)
+                if len(buf) >= WRITE_BATCH_ROWS:
+                    writer.writerows(buf)
+                    buf.clear()
+            writer.writerows(buf)
 
     print(f"Ports-resolved CSV written: {out_path}")
     return 0
@@ -0,0 +1,56 @@
+"""
+Parquet output of scripts/resolve_name.py (RESOLVE_OUTPUT_FORMAT=parquet).
+"""
+
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _load_resolve_name():
+    spec = importlib.util.spec_from_file_location("resolve_name", ROOT / "scripts" / "resolve_name.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_write_parquet_pads_and_truncates_rows(tmp_path: Path) -> None:
+    resolve_name = _load_resolve_name()
+    out = tmp_path / "out.parquet"
+    header = ["policyid", "srcaddr", "dstaddr"]
+    rows = [
+        ["1", "a[10.0.0.1]", "b[10.0.0.2]"],
+        ["2", "c[10.0.0.3]"],
+        ["3", "d[10.0.0.4]", "e[10.0.0.5]", "extra"],
+    ]
+
+    resolve_name._write_parquet(out, header, iter(rows))
+
+    table = pq.read_table(out)
+    assert table.column_names == header
+    assert table.to_pydict() == {
+        "policyid": ["1", "2", "3"],
+        "srcaddr": ["a[10.0.0.1]", "c[10.0.0.3]", "d[10.0.0.4]"],
+        "dstaddr": ["b[10.0.0.2]", "", "e[10.0.0.5]"],
+    }
+
+
+def test_write_parquet_batches(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    resolve_name = _load_resolve_name()
+    monkeypatch.setattr(resolve_name, "PARQUET_BATCH_ROWS", 2)
+    out = tmp_path / "out.parquet"
+    rows = [[str(i), f"h{i}"] for i in range(5)]
+
+    resolve_name._write_parquet(out, ["id", "host"], iter(rows))
+
+    assert pq.read_table(out).to_pydict() == {
+        "id": ["0", "1", "2", "3", "4"],
+        "host": ["h0", "h1", "h2", "h3", "h4"],
+    }